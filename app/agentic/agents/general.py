@@ -11,9 +11,9 @@ This agent handles:
 from typing import Dict, Any, List
 from langchain_core.messages import HumanMessage, SystemMessage, BaseMessage
 
-from ..state import AgentState
-from ...utils.helpers import load_prompt
-from ...utils.llm_factory import get_llm
+from ..state import AgentState, AgentContext
+from ...utils.helpers import load_cached_prompt
+from ...utils.llm_factory import get_cached_llm
 from ...utils.tracing import trace_agent
 from config.llm_config import get_llm_config
 
@@ -30,37 +30,26 @@ def general_agent(state: AgentState) -> Dict[str, Any]:
         Updated state with general_output
     """
     llm_config = get_llm_config()
-    user_input = state["user_input"]
-    intent = state.get("intent", "")
-    
-    # Get context from retrieval agents
-    knowledge_output = state.get("knowledge_output")
-    memory_output = state.get("memory_output")
+    ctx = AgentContext.from_state(state)
     
     # Load general prompt
-    general_prompt = load_prompt("general.md")
+    general_prompt = load_cached_prompt("general.md")
     
     # Initialize LLM with configurable provider and model
-    llm = get_llm(
+    llm = get_cached_llm(
         llm_config.GENERAL_LLM,
         temperature=0.7
     )
     
     # Build context section
-    context_parts = []
-    if knowledge_output:
-        context_parts.append(f"=== COMPANY KNOWLEDGE ===\n{knowledge_output}")
-    if memory_output:
-        context_parts.append(f"=== USER HISTORY ===\n{memory_output}")
-    
-    context_section = "\n\n".join(context_parts) if context_parts else "No additional context available."
+    context_section = ctx.retrieval_section()
     
     # Build messages
     llm_messages: List[BaseMessage] = [
         SystemMessage(content=general_prompt),
-        HumanMessage(content=f"""Task Intent: {intent}
+        HumanMessage(content=f"""Task Intent: {ctx.intent}
 
-        User Question: {user_input}
+        User Question: {ctx.user_input}
 
         {context_section}
 
@@ -72,8 +61,7 @@ def general_agent(state: AgentState) -> Dict[str, Any]:
     response = llm.invoke(llm_messages)
     
     # Update only general_output field and mark as executed
-    executed = state.get("executed_agents", [])
     return {
         "general_output": response.content,
-        "executed_agents": executed + ["general"]
+        "executed_agents": [*ctx.executed_agents, "general"]
     }
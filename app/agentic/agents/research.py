@@ -5,9 +5,9 @@ Research Agent - Provides factual, research-based information
 from typing import Dict, Any
 from langchain_core.messages import HumanMessage, SystemMessage
 
-from ..state import AgentState
-from ...utils.helpers import load_prompt
-from ...utils.llm_factory import get_llm
+from ..state import AgentState, AgentContext
+from ...utils.helpers import load_cached_prompt
+from ...utils.llm_factory import get_cached_llm
 from ...utils.tracing import trace_agent
 from config.llm_config import get_llm_config
 
@@ -24,37 +24,26 @@ def research_agent(state: AgentState) -> Dict[str, Any]:
         Updated state with research_output
     """
     llm_config = get_llm_config()
-    user_input = state["user_input"]
-    intent = state.get("intent", "")
-    
-    # Get context from retrieval agents
-    knowledge_output = state.get("knowledge_output")
-    memory_output = state.get("memory_output")
+    ctx = AgentContext.from_state(state)
     
     # Load research prompt
-    research_prompt = load_prompt("research.md")
+    research_prompt = load_cached_prompt("research.md")
     
     # Initialize LLM with configurable provider and model
-    llm = get_llm(
+    llm = get_cached_llm(
         llm_config.RESEARCH_LLM,
         temperature=llm_config.RESEARCH_TEMPERATURE
     )
     
     # Build context section
-    context_parts = []
-    if knowledge_output:
-        context_parts.append(f"=== COMPANY KNOWLEDGE ===\n{knowledge_output}")
-    if memory_output:
-        context_parts.append(f"=== USER HISTORY ===\n{memory_output}")
-    
-    context_section = "\n\n".join(context_parts) if context_parts else "No additional context available."
+    context_section = ctx.retrieval_section()
     
     # Create messages
     messages = [
         SystemMessage(content=research_prompt),
-        HumanMessage(content=f"""Task Intent: {intent}
+        HumanMessage(content=f"""Task Intent: {ctx.intent}
 
-        User Question: {user_input}
+        User Question: {ctx.user_input}
 
         {context_section}
 
@@ -66,8 +55,7 @@ def research_agent(state: AgentState) -> Dict[str, Any]:
     response = llm.invoke(messages)
     
     # Update only research_output field and mark as executed
-    executed = state.get("executed_agents", [])
     return {
         "research_output": response.content,
-        "executed_agents": executed + ["research"]
+        "executed_agents": [*ctx.executed_agents, "research"]
     }
@@ -5,9 +5,9 @@ Writing Agent - Creates well-structured, human-friendly content
 from typing import Dict, Any
 from langchain_core.messages import HumanMessage, SystemMessage
 
-from ..state import AgentState
-from ...utils.helpers import load_prompt
-from ...utils.llm_factory import get_llm
+from ..state import AgentState, AgentContext
+from ...utils.helpers import load_cached_prompt
+from ...utils.llm_factory import get_cached_llm
 from ...utils.tracing import trace_agent
 from config.llm_config import get_llm_config
 
@@ -24,48 +24,42 @@ def writing_agent(state: AgentState) -> Dict[str, Any]:
         Updated state with writing_output
     """
     llm_config = get_llm_config()
-    user_input = state["user_input"]
-    intent = state.get("intent", "")
-    
-    # Get context from other agents
-    research_output = state.get("research_output", "")
-    knowledge_output = state.get("knowledge_output")
-    memory_output = state.get("memory_output")
+    ctx = AgentContext.from_state(state)
     
     # Load writing prompt
-    writing_prompt = load_prompt("writing.md")
+    writing_prompt = load_cached_prompt("writing.md")
     
     # Initialize LLM with configurable provider and model
-    llm = get_llm(
+    llm = get_cached_llm(
         llm_config.WRITING_LLM,
         temperature=llm_config.WRITING_TEMPERATURE
     )
     
     # Build context for writing
-    context = f"""Task Intent: {intent}
+    context = f"""Task Intent: {ctx.intent}
 
-    User Question: {user_input}
+    User Question: {ctx.user_input}
     """
     
-    if knowledge_output:
+    if ctx.knowledge_output:
         context += f"""
 
         === COMPANY KNOWLEDGE ===
-        {knowledge_output}
+        {ctx.knowledge_output}
         """
     
-    if memory_output:
+    if ctx.memory_output:
         context += f"""
 
         === USER HISTORY ===
-        {memory_output}
+        {ctx.memory_output}
         """
     
-    if research_output:
+    if ctx.research_output:
         context += f"""
 
         Research Context (use this information):
-        {research_output}
+        {ctx.research_output}
         """
     
     # Create messages
@@ -78,8 +72,7 @@ def writing_agent(state: AgentState) -> Dict[str, Any]:
     response = llm.invoke(messages)
     
     # Update only writing_output field and mark as executed
-    executed = state.get("executed_agents", [])
     return {
         "writing_output": response.content,
-        "executed_agents": executed + ["writing"]
+        "executed_agents": [*ctx.executed_agents, "writing"]
     }
@@ -5,17 +5,18 @@ This file constructs the LangGraph with:
 - Orchestrator router node
 - Specialized agent nodes
 - Aggregator node
-- Conditional routing logic
+- Conditional routing logic (independent agents run in parallel)
 - Memory handled by AutoMem service (no LangGraph checkpointing)
 - LangSmith tracing for monitoring and debugging
 """
 
-from typing import Literal, Dict, Any
+from functools import partial
+from typing import Dict, Any, List
 from langgraph.graph import StateGraph, END
 
 from config.settings import get_settings
 from .state import AgentState
-from .orchestrator import orchestrator_router
+from .orchestrator import orchestrator_router, should_route_to_agents
 from .agents import research_agent, writing_agent, code_agent, general_agent, knowledge_agent, memory_agent
 from .aggregator import aggregator
 
@@ -26,65 +27,74 @@ settings = get_settings()
 RETRIEVAL_AGENTS = {"knowledge", "memory"}
 PROCESSING_AGENTS = {"general", "research", "writing", "code"}
 
+# Processing agents that read another agent's output (writing uses research_output)
+AGENT_DEPENDENCIES = {"writing": "research"}
 
-def route_from_orchestrator(state: AgentState) -> str:
+
+def execution_waves(selected: List[str]) -> List[List[str]]:
     """
-    Route from orchestrator to the first agent or aggregator.
+    Group the selected agents into waves; agents in one wave run in parallel.
     
-    Priority order:
-    1. Retrieval agents first (knowledge, memory) - they provide context
-    2. Processing agents second (general, research, writing, code)
-    3. Aggregator if no agents selected
-    """
-    selected = state.get("selected_agents", [])
-    if not selected:
-        return "aggregator"
+    Wave order:
+    1. Retrieval agents (knowledge, memory) - they provide context
+    2. Processing agents (general, research, writing, code)
+    3. Processing agents whose dependency was selected too (writing after research)
     
-    # Check for retrieval agents first (they should execute before processing)
-    for agent in ["knowledge", "memory"]:
-        if agent in selected:
-            return agent
+    Empty waves are left out.
+    """
+    retrieval = [a for a in ["knowledge", "memory"] if a in selected]
+    processing = [
+        a for a in ["general", "research", "writing", "code"]
+        if a in selected and AGENT_DEPENDENCIES.get(a) not in selected
+    ]
+    dependent = [
+        a for a in ["general", "research", "writing", "code"]
+        if a in selected and AGENT_DEPENDENCIES.get(a) in selected
+    ]
+    return [wave for wave in (retrieval, processing, dependent) if wave]
+
+
+def _final_node(selected: List[str]) -> str:
+    """Passthrough for a single processing agent, otherwise the aggregator."""
+    processing_agents_selected = [a for a in selected if a in PROCESSING_AGENTS]
     
-    # Then check for processing agents
-    for agent in ["general", "research", "writing", "code"]:
-        if agent in selected:
-            return agent
+    # If exactly 1 processing agent, skip aggregator (passthrough)
+    if len(processing_agents_selected) == 1:
+        return "passthrough"
     
+    # Otherwise, aggregate
     return "aggregator"
 
 
-def route_from_agent(state: AgentState) -> str:
+def route_from_orchestrator(state: AgentState) -> List[str]:
     """
-    Route from current agent to the next agent or to aggregation.
+    Route from orchestrator to the first wave of agents, or to aggregator.
     
-    Returns the next agent in priority order, or routes to aggregation.
-    Priority: retrieval agents → processing agents → aggregation
+    Agent names the graph has no node for are ignored.
     """
-    selected = state.get("selected_agents", [])
-    
-    # Get list of agents that have already executed from state tracking
-    executed = set(state.get("executed_agents", []))
-    
-    # Find next agent to execute (in priority order)
-    # Retrieval agents first
-    for agent in ["knowledge", "memory"]:
-        if agent in selected and agent not in executed:
-            return agent
+    selected = should_route_to_agents(state)
+    waves = execution_waves(selected)
+    if not waves:
+        return ["aggregator"]
     
-    # Then processing agents
-    for agent in ["general", "research", "writing", "code"]:
-        if agent in selected and agent not in executed:
-            return agent
+    return waves[0]
+
+
+def route_from_agent(state: AgentState, agent: str) -> List[str]:
+    """
+    Route from `agent` to the next wave of agents, or to passthrough/aggregation.
     
-    # All selected agents have executed, check if we need aggregation
-    processing_agents_selected = [a for a in selected if a in PROCESSING_AGENTS]
+    Every agent in a wave returns the same targets, so LangGraph starts the
+    next wave once, after the whole wave has finished.
+    """
+    selected = should_route_to_agents(state)
+    waves = execution_waves(selected)
     
-    # If exactly 1 processing agent, skip aggregator (passthrough)
-    if len(processing_agents_selected) == 1:
-        return "passthrough"
+    for index, wave in enumerate(waves[:-1]):
+        if agent in wave:
+            return waves[index + 1]
     
-    # Otherwise, aggregate
-    return "aggregator"
+    return [_final_node(selected)]
 
 
 def passthrough_output(state: AgentState) -> Dict[str, Any]:
@@ -129,7 +139,7 @@ def build_graph():
     # Set entry point
     workflow.set_entry_point("orchestrator")
     
-    # Route from orchestrator to first agent (retrieval agents have priority)
+    # Route from orchestrator to the first wave (retrieval agents have priority)
     workflow.add_conditional_edges(
         "orchestrator",
         route_from_orchestrator,
@@ -144,12 +154,12 @@ def build_graph():
         }
     )
     
-    # Each agent routes to the next agent or to aggregation
-    # This ensures sequential execution: retrieval → processing → aggregation
+    # Each agent routes to the next wave or to aggregation; agents within a
+    # wave run in parallel: retrieval → processing → aggregation
     for agent in ["knowledge", "memory", "general", "research", "writing", "code"]:
         workflow.add_conditional_edges(
             agent,
-            route_from_agent,
+            partial(route_from_agent, agent=agent),
             {
                 "knowledge": "knowledge",
                 "memory": "memory",
@@ -7,76 +7,242 @@ The Orchestrator Agent NEVER answers questions directly. It only:
 3. Updates the state with selected agents
 """
 
+import asyncio
 import json
-from typing import Dict, Any
+import sys
+from functools import lru_cache
+from typing import Dict, Any, List, Sequence, Tuple
 from langchain_core.messages import HumanMessage, SystemMessage
 
-from .state import AgentState
-from ..utils.helpers import load_prompt
-from ..utils.llm_factory import get_llm
+from .state import OrchestratorState, RoutingState
+from ..utils.helpers import load_cached_prompt
+from ..utils.llm_factory import get_cached_llm
 from ..utils.tracing import trace_agent
 from config.llm_config import get_llm_config
 
 
-@trace_agent("orchestrator", run_type="chain", tags=["orchestrator", "router"])
-def orchestrator_router(state: AgentState) -> Dict[str, Any]:
+def _json_object_bounds(content: str) -> Tuple[int, int]:
     """
-    Orchestrator agent that routes requests to appropriate specialized agents.
+    Locate the first top-level JSON object in an LLM response.
     
-    Args:
-        state: Current agent state with user input
-        
-    Returns:
-        Updated state with intent and selected_agents
+    One pass from the first "{" to its matching "}", skipping braces inside
+    strings. Returns (start, end) slice bounds; start is -1 when there is no
+    "{" and end is -1 when the object hasn't closed yet.
     """
-    llm_config = get_llm_config()
-    user_input = state["user_input"]
+    start = content.find("{")
+    if start == -1:
+        return -1, -1
     
-    # Load orchestrator prompt
-    orchestrator_prompt = load_prompt("orchestrator.md")
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(content)):
+        char = content[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return start, i + 1
     
-    # Initialize LLM with configurable provider and model
-    llm = get_llm(
+    return start, -1
+
+
+def _extract_json(content: str) -> str:
+    """
+    Slice the first top-level JSON object out of an LLM response.
+    
+    Markdown fences or prose around the object are dropped. Returns the
+    input unchanged when it has no object, leaving json.loads to reject it.
+    """
+    start, end = _json_object_bounds(content)
+    if start == -1:
+        return content
+    return content[start:end] if end != -1 else content[start:]
+
+
+@lru_cache(maxsize=1)
+def _get_system_message() -> SystemMessage:
+    """Build the orchestrator system message once; the prompt is static."""
+    return SystemMessage(content=load_cached_prompt("orchestrator.md"))
+
+
+def warm_up() -> None:
+    """
+    Build the orchestrator LLM client and system message ahead of the first request.
+    
+    Fills the same caches orchestrator_router reads, so the first routing
+    call doesn't pay for client construction or the prompt file read. No
+    LLM call is made.
+    """
+    llm_config = get_llm_config()
+    get_cached_llm(
         llm_config.ORCHESTRATOR_LLM,
         temperature=llm_config.ORCHESTRATOR_TEMPERATURE
     )
+    _get_system_message()
+
+
+def preload() -> None:
+    """
+    Read the orchestrator prompt in a pre-fork parent process.
+    
+    Forked workers inherit the cached system message, so only the parent
+    reads the prompt file. The LLM client is left for each worker to build,
+    since its connection pool must not be shared across processes.
+    """
+    _get_system_message()
+
+
+def post_fork_init() -> None:
+    """
+    Reset per-process orchestrator state in a freshly forked worker.
     
-    # Create messages
+    Drops every LLM client inherited from the parent (the shared
+    get_cached_llm cache) so the worker opens its own connections; the
+    cached system message is kept.
+    """
+    get_cached_llm.cache_clear()
+
+
+# Agent nodes the graph can route to (retrieval + processing agents)
+_VALID_AGENTS = frozenset({"knowledge", "memory", "general", "research", "writing", "code"})
+
+# Canonical (interned) agent name objects, so names parsed from LLM JSON
+# share one string per agent instead of a fresh copy per response
+_AGENT_NAMES = {name: sys.intern(name) for name in _VALID_AGENTS}
+
+
+# Routing decisions remembered per (input, model, temperature)
+_ROUTE_CACHE_SIZE = 1024
+
+# Inputs that are obviously small talk; routed to general without an LLM call
+_FASTPATH_GREETINGS = frozenset({"hi", "hello", "hey", "thanks", "bye"})
+
+
+@lru_cache(maxsize=_ROUTE_CACHE_SIZE)
+def _route(
+    user_input: str,
+    llm_model: str,
+    temperature: float
+) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Ask the LLM for a routing decision, memoized so repeated inputs skip the call.
+    
+    Raises json.JSONDecodeError when the response can't be parsed; lru_cache
+    doesn't store exceptions, so a failed parse is retried next time.
+    """
+    # Initialize LLM with configurable provider and model
+    llm = get_cached_llm(llm_model, temperature=temperature)
+    
+    # Create messages (the system message is shared across calls)
     messages = [
-        SystemMessage(content=orchestrator_prompt),
+        _get_system_message(),
         HumanMessage(content=f"User input: {user_input}")
     ]
     
     # Get routing decision
-    response = llm.invoke(messages)
+    content = str(llm.invoke(messages).content)
     
-    # Parse JSON response
-    try:
-        # Extract JSON from response (handles markdown code blocks)
-        content = str(response.content).strip()
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-            
-        routing_decision = json.loads(content)
+    # Extract JSON from response (handles markdown code blocks)
+    routing_decision = json.loads(_extract_json(content))
+    return (
+        routing_decision.get("intent", ""),
+        tuple(
+            _AGENT_NAMES.get(agent, agent)
+            for agent in routing_decision.get("selected_agents", [])
+        )
+    )
+
+
+@trace_agent("orchestrator", run_type="chain", tags=["orchestrator", "router"])
+def orchestrator_router(state: RoutingState) -> Dict[str, Any]:
+    """
+    Orchestrator agent that routes requests to appropriate specialized agents.
+    
+    Args:
+        state: Current agent state (or OrchestratorState) with user input
         
-        # Update state
+    Returns:
+        Updated state with intent and selected_agents
+    """
+    llm_config = get_llm_config()
+    if isinstance(state, OrchestratorState):
+        user_input = state.user_input
+    else:
+        user_input = state["user_input"]
+    
+    user_input = user_input.strip()
+    if user_input.lower() in _FASTPATH_GREETINGS:
         return {
-            "intent": routing_decision.get("intent", ""),
-            "selected_agents": routing_decision.get("selected_agents", [])
+            "intent": "fastpath greeting",
+            "selected_agents": ["general"]
         }
+    
+    try:
+        intent, selected_agents = _route(
+            user_input,
+            llm_config.ORCHESTRATOR_LLM,
+            llm_config.ORCHESTRATOR_TEMPERATURE
+        )
     except json.JSONDecodeError:
         # Fallback: route to writing agent
         return {
             "intent": "fallback - parsing error",
             "selected_agents": ["writing"]
         }
+    
+    # Update state (fresh list, so callers can't mutate the cached decision)
+    return {
+        "intent": intent,
+        "selected_agents": list(selected_agents)
+    }
+
+
+async def aorchestrator_router_batch(
+    states: Sequence[RoutingState],
+    *,
+    concurrency: int = 16
+) -> List[Dict[str, Any]]:
+    """
+    Route several requests concurrently.
+    
+    Each state goes through orchestrator_router in a worker thread, with at
+    most `concurrency` LLM calls in flight, so the network latency of the
+    routing calls overlaps instead of adding up.
+    
+    Args:
+        states: Agent states to route
+        concurrency: Maximum number of routing calls running at once
+        
+    Returns:
+        One routing update (intent and selected_agents) per state, in input order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def route_one(state: RoutingState) -> Dict[str, Any]:
+        async with semaphore:
+            return await asyncio.to_thread(orchestrator_router, state)
+    
+    return list(await asyncio.gather(*(route_one(state) for state in states)))
 
 
-def should_route_to_agents(state: AgentState) -> list[str]:
+def should_route_to_agents(state: RoutingState) -> list[str]:
     """
-    Conditional routing function for LangGraph.
-    Returns list of agent names to execute.
+    Selected agents the graph can route to (used by graph.py's routing functions).
+    Returns list of agent names to execute, dropping names with no agent node.
     """
-    return state.get("selected_agents", [])
+    if isinstance(state, OrchestratorState):
+        selected = state.selected_agents
+    else:
+        selected = state.get("selected_agents", ())
+    return [agent for agent in selected if agent in _VALID_AGENTS]
@@ -5,7 +5,18 @@ This defines the mutable state object passed between all nodes in the LangGraph.
 Each agent only writes to its designated field.
 """
 
-from typing import TypedDict, Optional, List
+from dataclasses import dataclass, field
+from typing import Annotated, Any, Mapping, TypedDict, Optional, List, Tuple, Union
+
+
+def merge_executed_agents(left: List[str], right: List[str]) -> List[str]:
+    """
+    Reducer for executed_agents.
+    
+    Agents return the list they saw plus their own name; agents running in
+    parallel each return a different list, so keep every name once, in order.
+    """
+    return left + [agent for agent in right if agent not in left]
 
 
 class AgentState(TypedDict):
@@ -43,5 +54,76 @@ class AgentState(TypedDict):
     
     # Control fields
     selected_agents: List[str]
-    executed_agents: List[str]  # Track which agents have executed
+    executed_agents: Annotated[List[str], merge_executed_agents]  # Track which agents have executed
     final_output: Optional[str]
+
+
+@dataclass(slots=True, frozen=True)
+class AgentContext:
+    """
+    Read-only view of the state fields the processing agents consume.
+    
+    Built once per agent call with from_state(), so each state key is read
+    a single time; slots give fixed-offset attribute access afterwards.
+    
+    Attributes:
+        user_input: Original user query
+        intent: Orchestrator agent's interpretation of user intent
+        knowledge_output: Company policies/docs from knowledge agent
+        memory_output: User history from memory agent
+        research_output: Output from research agent
+        executed_agents: Agents that have already executed
+    """
+    user_input: str
+    intent: Optional[str] = ""
+    knowledge_output: Optional[str] = None
+    memory_output: Optional[str] = None
+    research_output: Optional[str] = None
+    executed_agents: Tuple[str, ...] = ()
+    
+    @classmethod
+    def from_state(cls, state: Mapping[str, Any]) -> "AgentContext":
+        """Snapshot the agent-facing fields of a graph state."""
+        get = state.get
+        return cls(
+            user_input=state["user_input"],
+            intent=get("intent", ""),
+            knowledge_output=get("knowledge_output"),
+            memory_output=get("memory_output"),
+            research_output=get("research_output"),
+            executed_agents=tuple(get("executed_agents", ()))
+        )
+    
+    def retrieval_section(self) -> str:
+        """Knowledge and memory outputs formatted as one prompt section."""
+        context_parts = []
+        if self.knowledge_output:
+            context_parts.append(f"=== COMPANY KNOWLEDGE ===\n{self.knowledge_output}")
+        if self.memory_output:
+            context_parts.append(f"=== USER HISTORY ===\n{self.memory_output}")
+        
+        return "\n\n".join(context_parts) if context_parts else "No additional context available."
+
+
+@dataclass(slots=True)
+class OrchestratorState:
+    """
+    Minimal routing state for callers that route outside the graph.
+    
+    Carries only the fields the orchestrator reads and writes, e.g. for
+    batch routing or routing a request before a full AgentState exists;
+    orchestrator_router and should_route_to_agents accept it anywhere they
+    accept an AgentState.
+    
+    Attributes:
+        user_input: Original user query
+        selected_agents: List of agents selected by orchestrator
+        intent: Orchestrator agent's interpretation of user intent
+    """
+    user_input: str
+    selected_agents: List[str] = field(default_factory=list)
+    intent: Optional[str] = ""
+
+
+# Either state shape the orchestrator functions accept
+RoutingState = Union[AgentState, OrchestratorState]
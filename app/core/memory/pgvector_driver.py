@@ -4,11 +4,168 @@ PGVector Memory Driver Implementation
 Implementation using PostgreSQL with pgvector extension for vector similarity search.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+import csv
+import hashlib
+import io
 import json
+import threading
+import weakref
 from .base import BaseMemoryDriver
 
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Recall queries rank by inner product (<#>), which matches the
+# halfvec_ip_ops HNSW indexes created by migration 007_ip_indexes.
+# Embeddings are unit-normalized, so inner product ranks exactly like
+# cosine distance without computing norms per comparison.
+
+# Connection pool bounds per driver (shared by all threads/requests)
+_POOL_MIN_CONN = 2
+_POOL_MAX_CONN = 16
+
+# Minimum HNSW candidate list size per query (pgvector default is 40)
+_HNSW_EF_SEARCH = 40
+
+# Largest hnsw.ef_search pgvector accepts; larger top_k is served by the
+# iterative scan (pgvector >= 0.8) rather than a wider candidate list
+_HNSW_EF_SEARCH_MAX = 1000
+
+# Tag exclusions are applied to HNSW candidates after the index scan, so
+# excluding recalls over-fetch by this factor to still fill top_k
+_EXCLUDE_TAGS_EF_FACTOR = 4
+
+# Planner setting issued (transaction-scoped) before every vector query;
+# without it Postgres may cost a sequential scan below the HNSW index
+_VECTOR_SCAN_SETTINGS = (
+    "SET LOCAL enable_seqscan = off",
+)
+
+# Keeps filtered queries scanning past ef_search candidates until top_k rows
+# survive the filters. Only issued on pgvector >= 0.8; older versions reject
+# the unknown hnsw.* setting. strict_order keeps results in distance order.
+_ITERATIVE_SCAN_SETTING = "SET LOCAL hnsw.iterative_scan = strict_order"
+_ITERATIVE_SCAN_MIN_VERSION = (0, 8)
+
+# Hot vector recall query, prepared once per pooled connection so Postgres
+# parses and plans it once; optional filters are passed as NULL
+_RECALL_VECTOR_PREPARE = """
+    PREPARE recall_vec (halfvec, integer, integer, text[], integer) AS
+    SELECT id, user_id, conversation_id, content, tags, metadata,
+           created_at, embedding <#> $1 AS distance
+    FROM memories
+    WHERE user_id = $2
+      AND ($3 IS NULL OR conversation_id = $3)
+      AND ($4 IS NULL OR NOT tags && $4)
+    ORDER BY embedding <#> $1
+    LIMIT $5
+"""
+_RECALL_VECTOR_EXECUTE = "EXECUTE recall_vec (%s::halfvec, %s, %s, %s, %s)"
+
+def _build_recent_recall_sql(has_conversation: bool, has_exclude_tags: bool) -> str:
+    """Build the chronological recall query for one combination of filters."""
+    sql = """
+        SELECT id, user_id, conversation_id, content, tags, metadata, created_at
+        FROM memories
+        WHERE user_id = %s
+    """
+    if has_conversation:
+        sql += " AND conversation_id = %s"
+    if has_exclude_tags:
+        sql += " AND NOT tags && %s"
+    return sql + " ORDER BY created_at DESC LIMIT %s"
+
+
+def _build_knowledge_recall_sql(has_category: bool) -> str:
+    """Build the global knowledge vector query with or without a category filter."""
+    sql = """
+        SELECT id, content, category, title, doc_id, tags, metadata, 
+               created_at, embedding <#> %s::halfvec AS distance
+        FROM global_knowledge
+        WHERE 1=1
+    """
+    if has_category:
+        sql += " AND category = %s"
+    return sql + " ORDER BY embedding <#> %s::halfvec LIMIT %s"
+
+
+# Recall queries for every filter combination, built once at import and
+# keyed by (has_conversation, has_exclude_tags) / has_category
+_RECALL_RECENT_SQL = {
+    (has_conversation, has_exclude_tags): _build_recent_recall_sql(has_conversation, has_exclude_tags)
+    for has_conversation in (False, True)
+    for has_exclude_tags in (False, True)
+}
+_KNOWLEDGE_RECALL_SQL = {
+    has_category: _build_knowledge_recall_sql(has_category)
+    for has_category in (False, True)
+}
+
+# Bulk knowledge ingestion: rows are COPYed into a transaction-scoped
+# staging table, then upserted into global_knowledge in one statement
+_KNOWLEDGE_STAGING_DDL = """
+    CREATE TEMP TABLE tmp_global_knowledge (
+        content text,
+        category varchar(100),
+        title varchar(500),
+        doc_id varchar(255),
+        tags text[],
+        metadata jsonb,
+        embedding halfvec(384),
+        created_at timestamp
+    ) ON COMMIT DROP
+"""
+_KNOWLEDGE_STAGING_COPY = (
+    "COPY tmp_global_knowledge (content, category, title, doc_id, tags, metadata, embedding, created_at) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+_KNOWLEDGE_STAGING_UPSERT = """
+    INSERT INTO global_knowledge (content, category, title, doc_id, tags, metadata, embedding, created_at)
+    SELECT content, category, title, doc_id, tags, metadata, embedding, created_at
+    FROM tmp_global_knowledge
+    ON CONFLICT (doc_id) DO UPDATE SET
+        content = EXCLUDED.content,
+        category = EXCLUDED.category,
+        title = EXCLUDED.title,
+        tags = EXCLUDED.tags,
+        metadata = EXCLUDED.metadata,
+        embedding = EXCLUDED.embedding
+    RETURNING id, content, category, title, doc_id, tags, metadata, created_at
+"""
+
+# Sentence embedding model (384 dimensions, matches the halfvec(384) columns)
+_EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Maximum number of embeddings kept per driver, keyed by content hash
+_EMBEDDING_CACHE_SIZE = 10_000
+
+# Texts per forward pass when encoding in bulk
+_EMBEDDING_BATCH_SIZE = 64
+
+
+def _parse_extversion(extversion: str) -> Tuple[int, ...]:
+    """Parse a pg_extension version string such as '0.8.0' into (0, 8)."""
+    return tuple(int(part) for part in extversion.split(".")[:2])
+
+
+def _pg_text_array(values: List[str]) -> str:
+    """Render a Postgres text[] literal for COPY input."""
+    quoted = (value.replace('\\', '\\\\').replace('"', '\\"') for value in values)
+    return '{' + ','.join(f'"{value}"' for value in quoted) + '}'
+
+
+@lru_cache(maxsize=1)
+def _load_model(name: str):
+    """Load a SentenceTransformer once per process and share it across drivers."""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
 
 class PGVectorDriver(BaseMemoryDriver):
     """
@@ -26,44 +183,154 @@ class PGVectorDriver(BaseMemoryDriver):
             connection_string: PostgreSQL connection string
         """
         self._connection_string = connection_string
-        self._connection = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # Pooled connections whose session already has recall_vec prepared
+        self._prepared_connections = weakref.WeakSet()
+        # Set from the installed pgvector version when the pool is created
+        self._iterative_scan = False
         self._embedding_model = None
+        self._embedding_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        # The driver is shared across threads; guards every cache read/write
+        self._embedding_cache_lock = threading.Lock()
     
-    def _get_connection(self):
-        """Get or create database connection."""
-        if self._connection is None:
-            import psycopg2
-            from psycopg2.extras import RealDictCursor
-            
-            if not self._connection_string:
-                from config.settings import get_settings
-                settings = get_settings()
-                self._connection_string = settings.DATABASE_URL
-            
-            self._connection = psycopg2.connect(
-                self._connection_string,
-                cursor_factory=RealDictCursor
-            )
-            
-            # Ensure pgvector extension is enabled
-            with self._connection.cursor() as cursor:
+    def _create_pool(self):
+        """Create the connection pool and ensure the pgvector extension exists."""
+        from psycopg2.pool import ThreadedConnectionPool
+        from psycopg2.extras import RealDictCursor
+        
+        if not self._connection_string:
+            from config.settings import get_settings
+            settings = get_settings()
+            self._connection_string = settings.DATABASE_URL
+        
+        pool = ThreadedConnectionPool(
+            _POOL_MIN_CONN,
+            _POOL_MAX_CONN,
+            self._connection_string,
+            cursor_factory=RealDictCursor
+        )
+        
+        # Ensure the pgvector extension exists and detect its version
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
                 cursor.execute("CREATE EXTENSION IF NOT EXISTS vector;")
-                self._connection.commit()
+                cursor.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector';")
+                extversion = cursor.fetchone()["extversion"]
+                self._iterative_scan = _parse_extversion(extversion) >= _ITERATIVE_SCAN_MIN_VERSION
+                conn.commit()
+            
+            # Adapt numpy arrays to pgvector types for every pooled connection
+            from pgvector.psycopg2 import register_vector
+            register_vector(conn, globally=True)
+        finally:
+            pool.putconn(conn)
         
-        return self._connection
+        return pool
+    
+    def _get_pool(self):
+        """Get or create the driver's connection pool."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = self._create_pool()
+        return self._pool
+    
+    @contextmanager
+    def _get_connection(self):
+        """Borrow a pooled connection for the duration of a with-block."""
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+    
+    def _prepare_recall_vector(self, conn, cursor) -> None:
+        """Prepare the vector recall statement on a connection's session, once."""
+        if conn not in self._prepared_connections:
+            cursor.execute(_RECALL_VECTOR_PREPARE)
+            self._prepared_connections.add(conn)
+    
+    def _set_vector_scan(self, cursor, ef_search: int) -> None:
+        """Steer the current transaction's next vector query onto the HNSW index."""
+        for setting in _VECTOR_SCAN_SETTINGS:
+            cursor.execute(setting)
+        if self._iterative_scan:
+            cursor.execute(_ITERATIVE_SCAN_SETTING)
+        cursor.execute("SET LOCAL hnsw.ef_search = %s", (ef_search,))
     
     def _get_embedding_model(self):
         """Get or create embedding model for vector generation."""
         if self._embedding_model is None:
-            from sentence_transformers import SentenceTransformer
-            self._embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            self._embedding_model = _load_model(_EMBEDDING_MODEL_NAME)
         return self._embedding_model
     
-    def _generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding vector for text."""
+    def _cached_embedding(self, key: bytes) -> Optional["np.ndarray"]:
+        """Look up an embedding in the LRU cache, marking it most recently used."""
+        with self._embedding_cache_lock:
+            cached = self._embedding_cache.get(key)
+            if cached is not None:
+                self._embedding_cache.move_to_end(key)
+            return cached
+    
+    def _cache_embedding(self, key: bytes, embedding: "np.ndarray") -> None:
+        """Insert an embedding into the LRU cache, evicting the oldest entry when full."""
+        with self._embedding_cache_lock:
+            self._embedding_cache[key] = embedding
+            if len(self._embedding_cache) > _EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+    
+    @staticmethod
+    def _embedding_key(text: str) -> bytes:
+        """Content hash used as the embedding cache key."""
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+    
+    def _generate_embedding(self, text: str) -> "np.ndarray":
+        """Generate embedding vector for text, reusing cached vectors for repeated content."""
+        key = self._embedding_key(text)
+        cached = self._cached_embedding(key)
+        if cached is not None:
+            return cached
+        
         model = self._get_embedding_model()
-        embedding = model.encode(text)
-        return embedding.tolist()
+        embedding = model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+        self._cache_embedding(key, embedding)
+        return embedding
+    
+    def _generate_embeddings(self, texts: List[str]) -> List["np.ndarray"]:
+        """Generate embeddings for several texts with a single batched encode call."""
+        keys = [self._embedding_key(text) for text in texts]
+        # Resolved vectors for this batch; built locally because a batch larger
+        # than the cache evicts its own earliest entries while inserting
+        found = {}
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key in found or key in missing:
+                continue
+            cached = self._cached_embedding(key)
+            if cached is not None:
+                found[key] = cached
+            else:
+                missing[key] = text
+        
+        if missing:
+            model = self._get_embedding_model()
+            vectors = model.encode(
+                list(missing.values()),
+                batch_size=_EMBEDDING_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            for key, vector in zip(missing, vectors):
+                found[key] = vector
+                self._cache_embedding(key, vector)
+        
+        return [found[key] for key in keys]
     
     def recall(
         self,
@@ -89,73 +356,61 @@ class PGVectorDriver(BaseMemoryDriver):
             List of memory documents with metadata
         """
         try:
-            conn = self._get_connection()
-            
             if use_vector and query:
-                # Vector similarity search
+                # Vector similarity search via the prepared recall_vec statement
                 query_embedding = self._generate_embedding(query)
-                embedding_str = '[' + ','.join(str(x) for x in query_embedding) + ']'
                 
-                sql = """
-                    SELECT id, user_id, conversation_id, content, tags, metadata, 
-                           created_at, embedding <=> %s::vector AS distance
-                    FROM memories
-                    WHERE user_id = %s
-                """
-                params: List[Any] = [embedding_str, user_id]
-                
-                if conversation_id:
-                    sql += " AND conversation_id = %s"
-                    params.append(conversation_id)
-                
-                if exclude_tags:
-                    sql += " AND NOT tags && %s"
-                    params.append(exclude_tags)
+                sql = _RECALL_VECTOR_EXECUTE
+                params: List[Any] = [
+                    query_embedding,
+                    user_id,
+                    conversation_id or None,
+                    exclude_tags or None,
+                    top_k
+                ]
                 
-                sql += " ORDER BY embedding <=> %s::vector LIMIT %s"
-                params.extend([embedding_str, top_k])
+                # HNSW returns at most ef_search candidates, so keep it >= top_k
+                # (and wider when exclusions will discard some of them)
+                candidates = top_k * _EXCLUDE_TAGS_EF_FACTOR if exclude_tags else top_k
+                ef_search = min(max(_HNSW_EF_SEARCH, candidates), _HNSW_EF_SEARCH_MAX)
                 
             else:
                 # Chronological retrieval
-                sql = """
-                    SELECT id, user_id, conversation_id, content, tags, metadata, created_at
-                    FROM memories
-                    WHERE user_id = %s
-                """
+                sql = _RECALL_RECENT_SQL[(bool(conversation_id), bool(exclude_tags))]
                 params: List[Any] = [user_id]
-                
                 if conversation_id:
-                    sql += " AND conversation_id = %s"
                     params.append(conversation_id)
-                
                 if exclude_tags:
-                    sql += " AND NOT tags && %s"
                     params.append(exclude_tags)
-                
-                sql += " ORDER BY created_at DESC LIMIT %s"
                 params.append(top_k)
+                ef_search = None
             
-            with conn.cursor() as cursor:
+            # Rows are reshaped below anyway, so read them as namedtuples rather
+            # than paying for the per-row dict the pool's RealDictCursor builds
+            from psycopg2.extras import NamedTupleCursor
+            
+            with self._get_connection() as conn, conn.cursor(cursor_factory=NamedTupleCursor) as cursor:
+                if ef_search is not None:
+                    self._prepare_recall_vector(conn, cursor)
+                    self._set_vector_scan(cursor, ef_search)
                 cursor.execute(sql, params)
                 results = cursor.fetchall()
             
             # Format results to match AutoMem structure
-            formatted_results = []
-            for row in results:
-                row_dict = dict(row)  # type: ignore
-                formatted_results.append({
-                    "id": row_dict["id"],
+            return [
+                {
+                    "id": row.id,
                     "memory": {
-                        "content": row_dict["content"],
-                        "tags": row_dict["tags"] or [],
-                        "metadata": row_dict["metadata"] or {}
+                        "content": row.content,
+                        "tags": row.tags or [],
+                        "metadata": row.metadata or {}
                     },
-                    "user_id": row_dict["user_id"],
-                    "conversation_id": row_dict["conversation_id"],
-                    "created_at": row_dict["created_at"].isoformat() if row_dict["created_at"] else None
-                })
-            
-            return formatted_results
+                    "user_id": row.user_id,
+                    "conversation_id": row.conversation_id,
+                    "created_at": row.created_at.isoformat() if row.created_at else None
+                }
+                for row in results
+            ]
             
         except Exception as e:
             print(f"[PGVECTOR DRIVER] Recall error: {e}")
@@ -179,50 +434,40 @@ class PGVectorDriver(BaseMemoryDriver):
             List of knowledge documents with metadata
         """
         try:
-            conn = self._get_connection()
             query_embedding = self._generate_embedding(query)
-            embedding_str = '[' + ','.join(str(x) for x in query_embedding) + ']'
-            
-            sql = """
-                SELECT id, content, category, title, doc_id, tags, metadata, 
-                       created_at, embedding <=> %s::vector AS distance
-                FROM global_knowledge
-                WHERE 1=1
-            """
-            params: List[Any] = [embedding_str]
             
+            sql = _KNOWLEDGE_RECALL_SQL[bool(category)]
+            params: List[Any] = [query_embedding]
             if category:
-                sql += " AND category = %s"
                 params.append(category.lower())
+            params.extend([query_embedding, top_k])
             
-            sql += " ORDER BY embedding <=> %s::vector LIMIT %s"
-            params.extend([embedding_str, top_k])
+            from psycopg2.extras import NamedTupleCursor
             
-            with conn.cursor() as cursor:
+            with self._get_connection() as conn, conn.cursor(cursor_factory=NamedTupleCursor) as cursor:
+                self._set_vector_scan(cursor, min(max(_HNSW_EF_SEARCH, top_k), _HNSW_EF_SEARCH_MAX))
                 cursor.execute(sql, params)
                 results = cursor.fetchall()
             
             # Format results to match AutoMem structure
-            formatted_results = []
-            for row in results:
-                row_dict = dict(row)  # type: ignore
-                formatted_results.append({
-                    "id": row_dict["id"],
+            return [
+                {
+                    "id": row.id,
                     "memory": {
-                        "content": row_dict["content"],
-                        "tags": row_dict["tags"] or [],
+                        "content": row.content,
+                        "tags": row.tags or [],
                         "metadata": {
-                            **(row_dict["metadata"] or {}),
-                            "category": row_dict["category"],
-                            "title": row_dict["title"],
-                            "doc_id": row_dict["doc_id"]
+                            **(row.metadata or {}),
+                            "category": row.category,
+                            "title": row.title,
+                            "doc_id": row.doc_id
                         }
                     },
-                    "category": row_dict["category"],
-                    "created_at": row_dict["created_at"].isoformat() if row_dict["created_at"] else None
-                })
-            
-            return formatted_results
+                    "category": row.category,
+                    "created_at": row.created_at.isoformat() if row.created_at else None
+                }
+                for row in results
+            ]
             
         except Exception as e:
             print(f"[PGVECTOR DRIVER] Recall global knowledge error: {e}")
@@ -250,24 +495,22 @@ class PGVectorDriver(BaseMemoryDriver):
             Stored memory with generated ID
         """
         try:
-            conn = self._get_connection()
             embedding = self._generate_embedding(content)
-            embedding_str = '[' + ','.join(str(x) for x in embedding) + ']'
             
             sql = """
                 INSERT INTO memories (user_id, conversation_id, content, tags, metadata, embedding, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s::vector, %s)
+                VALUES (%s, %s, %s, %s, %s, %s::halfvec, %s)
                 RETURNING id, user_id, conversation_id, content, tags, metadata, created_at
             """
             
-            with conn.cursor() as cursor:
+            with self._get_connection() as conn, conn.cursor() as cursor:
                 cursor.execute(sql, (
                     user_id,
                     conversation_id,
                     content,
                     tags or [],
                     json.dumps(metadata or {}),
-                    embedding_str,
+                    embedding,
                     datetime.utcnow()
                 ))
                 result = cursor.fetchone()
@@ -293,6 +536,78 @@ class PGVectorDriver(BaseMemoryDriver):
             print(f"[PGVECTOR DRIVER] Store error: {e}")
             return {}
     
+    def store_many(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Store several memories with one batched embedding pass and one INSERT.
+        
+        Args:
+            items: Memories to store, each a dict with the keyword arguments
+                of store() (user_id, content and optionally conversation_id,
+                tags, metadata)
+            
+        Returns:
+            List of stored memories with generated IDs
+        """
+        if not items:
+            return []
+        
+        try:
+            from psycopg2.extras import execute_values
+            
+            embeddings = self._generate_embeddings([item["content"] for item in items])
+            created_at = datetime.utcnow()
+            
+            rows = [
+                (
+                    item["user_id"],
+                    item.get("conversation_id"),
+                    item["content"],
+                    item.get("tags") or [],
+                    json.dumps(item.get("metadata") or {}),
+                    embedding,
+                    created_at
+                )
+                for item, embedding in zip(items, embeddings)
+            ]
+            
+            sql = """
+                INSERT INTO memories (user_id, conversation_id, content, tags, metadata, embedding, created_at)
+                VALUES %s
+                RETURNING id, user_id, conversation_id, content, tags, metadata, created_at
+            """
+            
+            with self._get_connection() as conn, conn.cursor() as cursor:
+                results = execute_values(
+                    cursor,
+                    sql,
+                    rows,
+                    template="(%s, %s, %s, %s, %s, %s::halfvec, %s)",
+                    page_size=len(rows),
+                    fetch=True
+                )
+                conn.commit()
+            
+            formatted_results = []
+            for row in results:
+                row_dict = dict(row)  # type: ignore
+                formatted_results.append({
+                    "id": row_dict["id"],
+                    "memory": {
+                        "content": row_dict["content"],
+                        "tags": row_dict["tags"] or [],
+                        "metadata": row_dict["metadata"] or {}
+                    },
+                    "user_id": row_dict["user_id"],
+                    "conversation_id": row_dict["conversation_id"],
+                    "created_at": row_dict["created_at"].isoformat() if row_dict["created_at"] else None
+                })
+            
+            return formatted_results
+            
+        except Exception as e:
+            print(f"[PGVECTOR DRIVER] Store many error: {e}")
+            return []
+    
     def store_global_knowledge(
         self,
         content: str,
@@ -315,9 +630,7 @@ class PGVectorDriver(BaseMemoryDriver):
             Stored document with generated ID
         """
         try:
-            conn = self._get_connection()
             embedding = self._generate_embedding(content)
-            embedding_str = '[' + ','.join(str(x) for x in embedding) + ']'
             
             tags = [f"category_{category.lower()}", "global_knowledge"]
             
@@ -326,7 +639,7 @@ class PGVectorDriver(BaseMemoryDriver):
                 # Update existing or insert with doc_id
                 sql = """
                     INSERT INTO global_knowledge (content, category, title, doc_id, tags, metadata, embedding, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s::vector, %s)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s::halfvec, %s)
                     ON CONFLICT (doc_id) DO UPDATE SET
                         content = EXCLUDED.content,
                         category = EXCLUDED.category,
@@ -340,11 +653,11 @@ class PGVectorDriver(BaseMemoryDriver):
                 # Simple insert
                 sql = """
                     INSERT INTO global_knowledge (content, category, title, doc_id, tags, metadata, embedding, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s::vector, %s)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s::halfvec, %s)
                     RETURNING id, content, category, title, doc_id, tags, metadata, created_at
                 """
             
-            with conn.cursor() as cursor:
+            with self._get_connection() as conn, conn.cursor() as cursor:
                 cursor.execute(sql, (
                     content,
                     category.lower(),
@@ -352,7 +665,7 @@ class PGVectorDriver(BaseMemoryDriver):
                     doc_id,
                     tags,
                     json.dumps(metadata or {}),
-                    embedding_str,
+                    embedding,
                     datetime.utcnow()
                 ))
                 result = cursor.fetchone()
@@ -377,6 +690,77 @@ class PGVectorDriver(BaseMemoryDriver):
             print(f"[PGVECTOR DRIVER] Store global knowledge error: {e}")
             return {}
     
+    def store_global_knowledge_bulk(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Store many knowledge documents with one COPY and one upsert.
+        
+        Args:
+            docs: Documents to store, each a dict with the keyword arguments
+                of store_global_knowledge() (content, category and optionally
+                title, doc_id, metadata). Later entries win on repeated doc_id.
+            
+        Returns:
+            List of stored documents with generated IDs
+        """
+        # ON CONFLICT cannot update the same row twice in one statement,
+        # so keep only the last entry per doc_id
+        latest = {doc["doc_id"]: index for index, doc in enumerate(docs) if doc.get("doc_id")}
+        docs = [
+            doc for index, doc in enumerate(docs)
+            if not doc.get("doc_id") or latest[doc["doc_id"]] == index
+        ]
+        
+        if not docs:
+            return []
+        
+        try:
+            embeddings = self._generate_embeddings([doc["content"] for doc in docs])
+            created_at = datetime.utcnow().isoformat()
+            
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            for doc, embedding in zip(docs, embeddings):
+                category = doc["category"].lower()
+                tags = [f"category_{category}", "global_knowledge"]
+                writer.writerow([
+                    doc["content"],
+                    category,
+                    doc.get("title"),
+                    doc.get("doc_id"),
+                    _pg_text_array(tags),
+                    json.dumps(doc.get("metadata") or {}),
+                    '[' + ','.join(str(x) for x in embedding.tolist()) + ']',
+                    created_at
+                ])
+            buffer.seek(0)
+            
+            with self._get_connection() as conn, conn.cursor() as cursor:
+                cursor.execute(_KNOWLEDGE_STAGING_DDL)
+                cursor.copy_expert(_KNOWLEDGE_STAGING_COPY, buffer)
+                cursor.execute(_KNOWLEDGE_STAGING_UPSERT)
+                results = cursor.fetchall()
+                conn.commit()
+            
+            formatted_results = []
+            for row in results:
+                row_dict = dict(row)  # type: ignore
+                formatted_results.append({
+                    "id": row_dict["id"],
+                    "memory": {
+                        "content": row_dict["content"],
+                        "tags": row_dict["tags"] or [],
+                        "metadata": row_dict["metadata"] or {}
+                    },
+                    "category": row_dict["category"],
+                    "created_at": row_dict["created_at"].isoformat() if row_dict["created_at"] else None
+                })
+            
+            return formatted_results
+            
+        except Exception as e:
+            print(f"[PGVECTOR DRIVER] Store global knowledge bulk error: {e}")
+            return []
+    
     def delete(
         self,
         memory_id: str,
@@ -393,8 +777,6 @@ class PGVectorDriver(BaseMemoryDriver):
             True if deleted successfully
         """
         try:
-            conn = self._get_connection()
-            
             sql = "DELETE FROM memories WHERE id = %s"
             params = [memory_id]
             
@@ -402,7 +784,7 @@ class PGVectorDriver(BaseMemoryDriver):
                 sql += " AND user_id = %s"
                 params.append(user_id)
             
-            with conn.cursor() as cursor:
+            with self._get_connection() as conn, conn.cursor() as cursor:
                 cursor.execute(sql, params)
                 conn.commit()
                 return cursor.rowcount > 0
@@ -419,10 +801,8 @@ class PGVectorDriver(BaseMemoryDriver):
             Dict with status and connection details
         """
         try:
-            conn = self._get_connection()
-            
             # Check if required tables exist
-            with conn.cursor() as cursor:
+            with self._get_connection() as conn, conn.cursor() as cursor:
                 cursor.execute("""
                     SELECT EXISTS (
                         SELECT FROM information_schema.tables 
@@ -463,6 +843,6 @@ class PGVectorDriver(BaseMemoryDriver):
             }
     
     def __del__(self):
-        """Clean up database connection."""
-        if self._connection:
-            self._connection.close()
+        """Close pooled database connections."""
+        if getattr(self, '_pool', None):
+            self._pool.closeall()
@@ -2,6 +2,8 @@
 Utility functions for the agentic AI system
 """
 
+from functools import lru_cache
+
 
 def load_prompt(filename: str) -> str:
     """
@@ -15,3 +17,20 @@ def load_prompt(filename: str) -> str:
     """
     with open(f"prompts/{filename}", "r") as f:
         return f.read()
+
+
+@lru_cache(maxsize=32)
+def load_cached_prompt(filename: str) -> str:
+    """
+    Load a prompt file once and reuse its contents
+    
+    Prompt files are static for the life of the process, so agents share
+    one read per file.
+    
+    Args:
+        filename: Name of the prompt file (e.g., 'orchestrator.md')
+        
+    Returns:
+        Content of the prompt file
+    """
+    return load_prompt(filename)
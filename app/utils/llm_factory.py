@@ -4,6 +4,7 @@ with LangSmith tracing support
 """
 
 import logging
+from functools import lru_cache
 from typing import Optional, List, Any
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.callbacks import BaseCallbackHandler
@@ -245,3 +246,21 @@ def get_llm(llm_config: str, temperature: float = 0.7, **kwargs) -> BaseChatMode
         Initialized LLM instance
     """
     return LLMFactory.create_llm(llm_config, temperature, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def get_cached_llm(llm_config: str, temperature: float) -> BaseChatModel:
+    """
+    Create an LLM instance once per (config, temperature) and reuse it.
+    
+    Agents call this on every request; the client (and its connection pool)
+    is built on first use and shared afterwards.
+    
+    Args:
+        llm_config: LLM configuration string (e.g., "openai:gpt-4o-mini")
+        temperature: Temperature for generation
+        
+    Returns:
+        Shared LLM instance
+    """
+    return get_llm(llm_config, temperature=temperature)
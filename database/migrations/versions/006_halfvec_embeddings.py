@@ -0,0 +1,53 @@
+"""store pgvector embeddings as halfvec
+
+Revision ID: 006_halfvec
+Revises: 005_pgvector
+Create Date: 2026-10-15 12:00:00.000000
+
+Converts memories.embedding and global_knowledge.embedding from
+vector(384) (float32) to halfvec(384) (float16, pgvector >= 0.7),
+halving row size and HNSW traversal bandwidth.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '006_halfvec'
+down_revision: Union[str, None] = '005_pgvector'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# HNSW indexes are tied to the column's operator class; migration
+# 007_ip_indexes builds their halfvec replacements
+_HNSW_INDEXES = ('idx_memories_embedding_hnsw', 'idx_knowledge_embedding_hnsw')
+_TABLES = ('memories', 'global_knowledge')
+
+
+def upgrade() -> None:
+    """Convert embedding columns to halfvec(384)."""
+    for index_name in _HNSW_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index_name};")
+    
+    for table_name in _TABLES:
+        op.execute(f"""
+            ALTER TABLE {table_name}
+            ALTER COLUMN embedding TYPE halfvec(384) USING embedding::halfvec(384);
+        """)
+    
+    print("✅ Embedding columns converted to halfvec(384)")
+
+
+def downgrade() -> None:
+    """Convert embedding columns back to vector(384)."""
+    for index_name in _HNSW_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index_name};")
+    
+    for table_name in _TABLES:
+        op.execute(f"""
+            ALTER TABLE {table_name}
+            ALTER COLUMN embedding TYPE vector(384) USING embedding::vector(384);
+        """)
+    
+    print("✅ Embedding columns converted back to vector(384)")
+    print("⚠️  Note: Recreate HNSW indexes with vector_cosine_ops if running a driver that casts to ::vector")
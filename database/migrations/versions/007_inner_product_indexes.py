@@ -0,0 +1,61 @@
+"""replace cosine HNSW indexes with inner product ones
+
+Revision ID: 007_ip_indexes
+Revises: 006_halfvec
+Create Date: 2026-10-15 13:00:00.000000
+
+Recall queries rank unit-normalized embeddings with the inner product
+operator (<#>), which cannot use the cosine HNSW indexes. The
+halfvec_ip_ops indexes are built CONCURRENTLY (outside the migration
+transaction) so writes to memories and global_knowledge keep flowing
+while they build; the cosine indexes are dropped once they exist.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '007_ip_indexes'
+down_revision: Union[str, None] = '006_halfvec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COSINE_INDEXES = {
+    'idx_memories_embedding_hnsw': 'memories',
+    'idx_knowledge_embedding_hnsw': 'global_knowledge',
+}
+_INNER_PRODUCT_INDEXES = {
+    'idx_memories_embedding_hnsw_ip': 'memories',
+    'idx_knowledge_embedding_hnsw_ip': 'global_knowledge',
+}
+
+
+def upgrade() -> None:
+    """Build inner product HNSW indexes, then drop the cosine ones (embeddings are unit length)."""
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for index_name, table_name in _INNER_PRODUCT_INDEXES.items():
+            op.execute(f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {table_name}
+                USING hnsw (embedding halfvec_ip_ops) WITH (m = 16, ef_construction = 64);
+            """)
+        
+        for index_name in _COSINE_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};")
+    
+    print("✅ Inner product HNSW indexes created; cosine HNSW indexes dropped")
+
+
+def downgrade() -> None:
+    """Restore cosine HNSW indexes and drop the inner product ones."""
+    with op.get_context().autocommit_block():
+        for index_name, table_name in _COSINE_INDEXES.items():
+            op.execute(f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {table_name}
+                USING hnsw (embedding halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
+            """)
+        
+        for index_name in _INNER_PRODUCT_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};")
+    
+    print("✅ Cosine HNSW indexes restored")
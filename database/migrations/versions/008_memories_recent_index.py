@@ -0,0 +1,37 @@
+"""index memories by user and recency
+
+Revision ID: 008_recent_index
+Revises: 007_ip_indexes
+Create Date: 2026-10-15 14:00:00.000000
+
+Chronological recall filters memories by user_id and returns the newest
+top_k rows. With only idx_memories_user_id, Postgres fetches every row for
+the user and sorts them; a (user_id, created_at DESC) index lets it read
+the newest rows in order and stop after top_k.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '008_recent_index'
+down_revision: Union[str, None] = '007_ip_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the (user_id, created_at DESC) index on memories."""
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_memories_user_created
+        ON memories (user_id, created_at DESC);
+    """)
+    
+    print("✅ Recency index created on memories")
+
+
+def downgrade() -> None:
+    """Drop the (user_id, created_at DESC) index."""
+    op.execute("DROP INDEX IF EXISTS idx_memories_user_created;")
+    
+    print("✅ Recency index dropped")
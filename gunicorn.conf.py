@@ -0,0 +1,22 @@
+"""
+Gunicorn configuration (picked up automatically from the working directory)
+
+    gunicorn server:app -w 4 -k uvicorn.workers.UvicornWorker
+
+The orchestrator prompt is read once in the master and inherited by every
+forked worker; each worker builds its own LLM client after the fork.
+"""
+
+
+def on_starting(server):
+    """Preload shared orchestrator state in the master before workers fork."""
+    from app.agentic.orchestrator import preload
+    
+    preload()
+
+
+def post_fork(server, worker):
+    """Reset per-process orchestrator state in each new worker."""
+    from app.agentic.orchestrator import post_fork_init
+    
+    post_fork_init()
@@ -23,6 +23,7 @@ from dotenv import load_dotenv
 from config.settings import get_settings
 from database import init_db
 from app.routes import auth_router, api_router
+from app.agentic.orchestrator import warm_up as warm_up_orchestrator
 
 # Load environment variables
 load_dotenv()
@@ -56,6 +57,13 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize database: {e}")
         raise
     
+    try:
+        # Build the routing LLM client and prompt before the first request
+        warm_up_orchestrator()
+        logger.info("Orchestrator warmed up")
+    except Exception as e:
+        logger.warning(f"Orchestrator warm-up failed, will initialize on first request: {e}")
+    
     yield
     
     # Shutdown
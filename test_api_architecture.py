@@ -79,13 +79,14 @@ def test_production_server():
     print("\nTesting production server...")
     try:
         from server import app
-        routes = [getattr(route, 'path', None) for route in app.routes]
-        routes = [r for r in routes if r is not None]  # Filter out None values
+        # Build the path set once; membership checks below are O(1)
+        route_paths = frozenset(r.path for r in app.routes if hasattr(r, 'path'))
         # Check for actual production routes
-        assert '/api/query' in routes or any('/api' in r for r in routes)
-        assert '/health' in routes
+        assert '/api/query' in route_paths or any(p.startswith('/api') for p in route_paths)
+        assert '/health' in route_paths
         print("✅ Production server configured correctly")
-        print(f"   Sample routes: {[r for r in routes if '/api' in r or r == '/health'][:5]}")
+        sample = sorted(p for p in route_paths if p.startswith('/api') or p == '/health')[:5]
+        print(f"   Sample routes: {sample}")
         return True
     except Exception as e:
         print(f"❌ Production server error: {e}")
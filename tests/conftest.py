@@ -3,9 +3,10 @@ Pytest Configuration and Shared Fixtures
 """
 
 import os
+import types
 import pytest
 from typing import Generator, Dict, Any
-from unittest.mock import Mock, MagicMock
+from unittest.mock import Mock, MagicMock, create_autospec
 from fastapi.testclient import TestClient
 
 # Set testing environment
@@ -14,10 +15,43 @@ os.environ["DATABASE_URL"] = "sqlite:///./test.db"
 os.environ["AUTOMEM_URL"] = "http://localhost:8001"
 
 
+@pytest.fixture
+def patched_llm(monkeypatch):
+    """
+    Patch the LLM factory and prompt loader beneath the shared caches.
+    
+    Every agent gets `patched_llm.llm` from get_cached_llm and
+    `patched_llm.prompt` from load_cached_prompt; LLM builds and prompt
+    reads are recorded in `llm_builds` and `prompt_loads`.
+    """
+    from app.utils.llm_factory import get_cached_llm
+    from app.utils.helpers import load_cached_prompt
+    
+    seam = types.SimpleNamespace(llm=Mock(), prompt="You are an assistant", llm_builds=[], prompt_loads=[])
+    
+    def get_llm(*args, **kwargs):
+        seam.llm_builds.append((args, kwargs))
+        return seam.llm
+    
+    def load_prompt(filename):
+        seam.prompt_loads.append(filename)
+        return seam.prompt
+    
+    monkeypatch.setattr("app.utils.llm_factory.get_llm", get_llm)
+    monkeypatch.setattr("app.utils.helpers.load_prompt", load_prompt)
+    get_cached_llm.cache_clear()
+    load_cached_prompt.cache_clear()
+    yield seam
+    get_cached_llm.cache_clear()
+    load_cached_prompt.cache_clear()
+
+
 @pytest.fixture
 def mock_automem_client():
-    """Mock AutoMem client for testing."""
-    client = Mock()
+    """Mock AutoMem client for testing, restricted to AutoMemClient's API."""
+    from app.core.automem_client import AutoMemClient
+    
+    client = create_autospec(AutoMemClient, instance=True)
     
     # Mock recall method
     client.recall.return_value = [
@@ -48,12 +82,19 @@ def mock_automem_client():
     return client
 
 
+# Set by pytest-xdist in each worker ("gw0", "gw1", ...); empty when serial
+_XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER", "")
+
+# Database test user, unique per xdist worker
+_TEST_USER_EMAIL = f"test{_XDIST_WORKER}@example.com"
+
+
 @pytest.fixture
 def sample_user_data() -> Dict[str, Any]:
     """Sample user data for testing."""
     return {
         "id": 1,
-        "email": "test@example.com",
+        "email": _TEST_USER_EMAIL,
         "username": "testuser",
         "is_active": True,
     }
@@ -73,9 +114,35 @@ def sample_conversation_data() -> Dict[str, Any]:
 @pytest.fixture
 def mock_llm_response():
     """Mock LLM response for testing agents."""
-    mock = Mock()
-    mock.content = "This is a test response from the LLM"
-    return mock
+    return types.SimpleNamespace(content="This is a test response from the LLM")
+
+
+@pytest.fixture(scope="session")
+def conversation_list_response():
+    """
+    ConversationController.list_conversations payload shared by API tests.
+    
+    Built once per session; the tuple and MappingProxyType items make it
+    read-only so one test cannot change what the next one sees.
+    """
+    return (
+        types.MappingProxyType({
+            "id": 1,
+            "title": "First Conversation",
+            "last_query": "What is AI?",
+            "message_count": 5,
+            "created_at": "2024-01-01T00:00:00",
+            "updated_at": "2024-01-01T00:00:00"
+        }),
+        types.MappingProxyType({
+            "id": 2,
+            "title": "Second Conversation",
+            "last_query": "Write code",
+            "message_count": 3,
+            "created_at": "2024-01-02T00:00:00",
+            "updated_at": "2024-01-02T00:00:00"
+        }),
+    )
 
 
 @pytest.fixture
@@ -112,10 +179,11 @@ def mock_httpx_client():
     """Mock httpx client for AutoMem API calls."""
     client = Mock()
     
-    # Mock successful GET response
-    get_response = Mock()
-    get_response.status_code = 200
-    get_response.json.return_value = {
+    # Responses are plain namespaces: only status_code, raise_for_status()
+    # and json() are read, and nothing asserts against the responses themselves
+    
+    # Successful GET response
+    get_payload = {
         "results": [
             {
                 "id": "mem1",
@@ -125,42 +193,58 @@ def mock_httpx_client():
         ],
         "vector_search": {"matched": True}
     }
-    client.get.return_value = get_response
+    client.get.return_value = types.SimpleNamespace(
+        status_code=200,
+        raise_for_status=lambda: None,
+        json=lambda: get_payload
+    )
     
-    # Mock successful POST response
-    post_response = Mock()
-    post_response.status_code = 200
-    post_response.json.return_value = {"id": "new_mem_id", "status": "stored"}
-    client.post.return_value = post_response
+    # Successful POST response
+    post_payload = {"id": "new_mem_id", "status": "stored"}
+    client.post.return_value = types.SimpleNamespace(
+        status_code=200,
+        raise_for_status=lambda: None,
+        json=lambda: post_payload
+    )
     
     return client
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def app_client() -> Generator:
-    """Test client for FastAPI app."""
+    """
+    Test client for FastAPI app.
+    
+    Session-scoped so the app's lifespan runs once per test run; tests pass
+    headers per request and must not set state on the client itself.
+    """
     from server import app
     
     with TestClient(app) as client:
         yield client
 
 
-@pytest.fixture
-def test_user(sample_user_data):
-    """Create a test user in the database."""
+@pytest.fixture(scope="session")
+def test_user():
+    """
+    Create a test user in the database.
+    
+    Session-scoped: the user is created once and removed after the last
+    test, so tests must not modify or delete it.
+    """
     from database import SessionLocal, User
     
     db = SessionLocal()
     try:
         # Check if user exists
-        user = db.query(User).filter(User.email == sample_user_data["email"]).first()
+        user = db.query(User).filter(User.email == _TEST_USER_EMAIL).first()
         
         if not user:
             # Create new user
             user = User(
-                email=sample_user_data["email"],
+                email=_TEST_USER_EMAIL,
                 name="Test User",
-                google_id="test_google_id_123",
+                google_id=f"test_google_id_123{_XDIST_WORKER}",
                 picture="https://example.com/pic.jpg"
             )
             db.add(user)
@@ -169,16 +253,21 @@ def test_user(sample_user_data):
         
         yield user
         
-        # Cleanup after test
-        db.query(User).filter(User.email == sample_user_data["email"]).delete()
+        # Cleanup after the session
+        db.query(User).filter(User.email == _TEST_USER_EMAIL).delete()
         db.commit()
     finally:
         db.close()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def auth_headers(test_user) -> Dict[str, str]:
-    """Generate auth headers with JWT token for test user."""
+    """
+    Generate auth headers with JWT token for test user.
+    
+    The token is signed once per session; requests still go through the
+    real get_current_user dependency, which verifies it.
+    """
     from app.utils.auth.security import create_access_token
     
     token = create_access_token(data={"sub": str(test_user.id), "email": test_user.email})
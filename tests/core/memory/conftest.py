@@ -0,0 +1,53 @@
+"""
+Shared fixtures for memory driver tests
+"""
+
+import pytest
+from contextlib import ExitStack
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.core.memory.manager import MemoryDriverManager, get_memory_driver
+
+
+def _reset_all_caches():
+    """Clear both the get_memory_driver() lru_cache and the manager's instance cache"""
+    get_memory_driver.cache_clear()
+    MemoryDriverManager.reset_cache()
+
+
+@pytest.fixture(autouse=True)
+def _driver_cache(request):
+    """
+    Keep driver caches isolated between tests.
+    
+    Caches are cleared once on teardown; tests marked ``fresh_cache`` also
+    get a clean cache up front instead of relying on the previous teardown.
+    """
+    if request.node.get_closest_marker("fresh_cache"):
+        _reset_all_caches()
+    yield
+    _reset_all_caches()
+
+
+@pytest.fixture
+def reset_driver_caches():
+    """Callable for tests that switch drivers mid-test"""
+    return _reset_all_caches
+
+
+@pytest.fixture(scope="module")
+def external_clients():
+    """
+    Patch the drivers' external clients once per test module.
+    
+    Returns the patched AutoMem client factory and psycopg2.connect so tests
+    can assert against them when needed.
+    """
+    with ExitStack() as stack:
+        yield SimpleNamespace(
+            get_default_client=stack.enter_context(
+                patch('app.core.memory.automem_driver.get_default_client')
+            ),
+            connect=stack.enter_context(patch('psycopg2.connect')),
+        )
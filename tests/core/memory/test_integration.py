@@ -4,11 +4,101 @@ Integration Tests for Memory Agents with Driver System
 Tests that memory and knowledge agents work correctly with the new driver system.
 """
 
+import re
+import types
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import patch
 from app.agentic.state import AgentState
 from app.agentic.agents.memory import memory_agent
 from app.agentic.agents.knowledge import knowledge_agent
+from app.core.memory.manager import get_memory_driver
+
+
+# Memory agent sections, which must appear in this order
+_FORMAT_RE = re.compile(
+    r"RECENT CONVERSATION.*RELEVANT FROM THIS CONVERSATION.*RELEVANT FROM PAST CONVERSATIONS",
+    re.DOTALL
+)
+# Splits a knowledge agent block "[CATEGORY] DOC_ID - Title\ncontent" into its fields
+_TOKEN_SPLIT_RE = re.compile(r"(?<=\]) | - |\n")
+_CATEGORY_RE = re.compile(r"^\[(?P<category>[A-Z_]+)\]", re.MULTILINE)
+
+_EMPTY_MD = types.MappingProxyType({})
+
+
+def _mem(id_, content, tags=(), md=_EMPTY_MD, user_id="user123"):
+    """Build a driver recall item in the shape drivers return"""
+    return {
+        "id": id_,
+        "memory": {"content": content, "tags": list(tags), "metadata": md},
+        "user_id": user_id
+    }
+
+
+# Recall payloads shared by memory agent tests; built once at import time.
+# The agent only reads these, so tests hand out shallow list copies.
+_RECENT_FIXTURE = (_mem("1", "user: Hello", ("user",)),)
+_SHORT_FIXTURE = (_mem("2", "assistant: Hi there", ("assistant",)),)
+_LONG_FIXTURE = (_mem("3", "user: Previous topic", ("user",)),)
+
+
+def _recall_by_kind(**kwargs):
+    """
+    Answer a memory agent recall by what it asks for, not by call order.
+    
+    Recent messages are a tag-only lookup (no query), short-term recall is
+    scoped to the conversation and long-term recall is not, so the agent
+    may issue the three recalls in any order or concurrently.
+    """
+    if kwargs["query"] is None:
+        return list(_RECENT_FIXTURE)
+    if kwargs["conversation_id"] is not None:
+        return list(_SHORT_FIXTURE)
+    return list(_LONG_FIXTURE)
+
+
+class _Recorder:
+    """
+    Minimal stand-in for a Mock method.
+    
+    Supports the subset of the Mock API these tests use: return_value,
+    side_effect (exception, callable, or list of per-call results consumed
+    in order), call_count, called and assert_called_once_with. call_count is
+    a plain counter attribute rather than something derived on access.
+    """
+    
+    def __init__(self, return_value=None):
+        self.return_value = return_value
+        self.side_effect = None
+        self.call_count = 0
+        self.calls = []
+    
+    @property
+    def called(self):
+        return self.call_count > 0
+    
+    def __call__(self, *args, **kwargs):
+        self.call_count += 1
+        self.calls.append((args, kwargs))
+        effect = self.side_effect
+        if isinstance(effect, BaseException):
+            raise effect
+        if callable(effect):
+            return effect(*args, **kwargs)
+        if effect is not None:
+            return effect.pop(0)
+        return self.return_value
+    
+    def assert_called_once_with(self, *args, **kwargs):
+        assert self.calls == [(args, kwargs)], f"Expected one call with {args} {kwargs}, got {self.calls}"
+
+
+class _StubDriver:
+    """Memory driver stub exposing only the recall methods agents use"""
+    
+    def __init__(self):
+        self.recall = _Recorder(return_value=[])
+        self.recall_global_knowledge = _Recorder(return_value=[])
 
 
 class TestMemoryAgentIntegration:
@@ -16,10 +106,8 @@ class TestMemoryAgentIntegration:
     
     @pytest.fixture
     def mock_driver(self):
-        """Mock memory driver"""
-        driver = Mock()
-        driver.recall.return_value = []
-        return driver
+        """Stub memory driver"""
+        return _StubDriver()
     
     @pytest.fixture
     def state(self):
@@ -35,33 +123,17 @@ class TestMemoryAgentIntegration:
         """Test that memory agent uses the configured driver"""
         mock_get_driver.return_value = mock_driver
         
-        # Mock driver responses
-        mock_driver.recall.side_effect = [
-            # Recent messages
-            [{
-                "id": "1",
-                "memory": {"content": "user: Hello", "tags": ["user"], "metadata": {}},
-                "user_id": "user123"
-            }],
-            # Short-term memories
-            [{
-                "id": "2",
-                "memory": {"content": "assistant: Hi there", "tags": ["assistant"], "metadata": {}},
-                "user_id": "user123"
-            }],
-            # Long-term memories
-            [{
-                "id": "3",
-                "memory": {"content": "Previous conversation", "tags": [], "metadata": {}},
-                "user_id": "user123"
-            }]
-        ]
+        mock_driver.recall.side_effect = _recall_by_kind
         
         result = memory_agent(state)
         
-        # Verify driver was called
+        # Verify driver was called once per recall kind, in whatever order
         assert mock_get_driver.called
         assert mock_driver.recall.call_count == 3
+        assert {
+            (kwargs["query"] is None, kwargs["conversation_id"] is None)
+            for _, kwargs in mock_driver.recall.calls
+        } == {(True, False), (False, False), (False, True)}
         
         # Verify result structure
         assert "memory_output" in result
@@ -98,36 +170,15 @@ class TestMemoryAgentIntegration:
         """Test that memory agent formats driver output correctly"""
         mock_get_driver.return_value = mock_driver
         
-        # Mock complete memory retrieval
-        mock_driver.recall.side_effect = [
-            # Recent
-            [{
-                "id": "1",
-                "memory": {"content": "user: How are you?", "tags": ["user"], "metadata": {}},
-                "user_id": "user123"
-            }],
-            # Short-term
-            [{
-                "id": "2",
-                "memory": {"content": "assistant: I'm doing well!", "tags": ["assistant"], "metadata": {}},
-                "user_id": "user123"
-            }],
-            # Long-term
-            [{
-                "id": "3",
-                "memory": {"content": "user: Previous topic", "tags": ["user"], "metadata": {}},
-                "user_id": "user123"
-            }]
-        ]
+        # Mock complete memory retrieval: recent, short-term, long-term
+        mock_driver.recall.side_effect = _recall_by_kind
         
         result = memory_agent(state)
         
         output = result["memory_output"]
         
-        # Should contain all sections
-        assert "RECENT CONVERSATION" in output
-        assert "RELEVANT FROM THIS CONVERSATION" in output
-        assert "RELEVANT FROM PAST CONVERSATIONS" in output
+        # Should contain all sections, in order
+        assert _FORMAT_RE.search(output) is not None
 
 
 class TestKnowledgeAgentIntegration:
@@ -135,10 +186,8 @@ class TestKnowledgeAgentIntegration:
     
     @pytest.fixture
     def mock_driver(self):
-        """Mock memory driver"""
-        driver = Mock()
-        driver.recall_global_knowledge.return_value = []
-        return driver
+        """Stub memory driver"""
+        return _StubDriver()
     
     @pytest.fixture
     def state(self):
@@ -154,18 +203,11 @@ class TestKnowledgeAgentIntegration:
         
         # Mock driver response
         mock_driver.recall_global_knowledge.return_value = [
-            {
-                "id": "doc1",
-                "memory": {
-                    "content": "Company policy document",
-                    "tags": ["category_policies", "global_knowledge"],
-                    "metadata": {
-                        "title": "HR Policy",
-                        "doc_id": "POL-001",
-                        "category": "policies"
-                    }
-                }
-            }
+            _mem(
+                "doc1", "Company policy document", ("category_policies", "global_knowledge"),
+                md={"title": "HR Policy", "doc_id": "POL-001", "category": "policies"},
+                user_id=None
+            )
         ]
         
         result = knowledge_agent(state)
@@ -208,31 +250,20 @@ class TestKnowledgeAgentIntegration:
         mock_get_driver.return_value = mock_driver
         
         mock_driver.recall_global_knowledge.return_value = [
-            {
-                "id": "doc1",
-                "memory": {
-                    "content": "Policy content",
-                    "tags": ["category_policies"],
-                    "metadata": {
-                        "title": "Policy Title",
-                        "doc_id": "POL-001"
-                    }
-                }
-            }
+            _mem(
+                "doc1", "Policy content", ("category_policies",),
+                md={"title": "Policy Title", "doc_id": "POL-001"}, user_id=None
+            )
         ]
         
         result = knowledge_agent(state)
         
         output = result["knowledge_output"]
         
-        # Should contain category tag
-        assert "[POLICIES]" in output
-        # Should contain doc_id
-        assert "POL-001" in output
-        # Should contain title
-        assert "Policy Title" in output
-        # Should contain content
-        assert "Policy content" in output
+        # Should contain category tag, doc_id, title and content
+        assert set(_TOKEN_SPLIT_RE.split(output)) >= {
+            "[POLICIES]", "POL-001", "Policy Title", "Policy content"
+        }
     
     @patch('app.agentic.agents.knowledge.get_memory_driver')
     def test_knowledge_agent_multiple_categories(self, mock_get_driver, mock_driver, state):
@@ -240,22 +271,8 @@ class TestKnowledgeAgentIntegration:
         mock_get_driver.return_value = mock_driver
         
         mock_driver.recall_global_knowledge.return_value = [
-            {
-                "id": "doc1",
-                "memory": {
-                    "content": "Policy doc",
-                    "tags": ["category_policies"],
-                    "metadata": {"title": "Policy"}
-                }
-            },
-            {
-                "id": "doc2",
-                "memory": {
-                    "content": "Guide doc",
-                    "tags": ["category_guidelines"],
-                    "metadata": {"title": "Guide"}
-                }
-            }
+            _mem("doc1", "Policy doc", ("category_policies",), md={"title": "Policy"}, user_id=None),
+            _mem("doc2", "Guide doc", ("category_guidelines",), md={"title": "Guide"}, user_id=None)
         ]
         
         result = knowledge_agent(state)
@@ -263,39 +280,30 @@ class TestKnowledgeAgentIntegration:
         output = result["knowledge_output"]
         
         # Should contain both categories
-        assert "[POLICIES]" in output
-        assert "[GUIDELINES]" in output
+        assert _CATEGORY_RE.findall(output) == ["POLICIES", "GUIDELINES"]
 
 
+@pytest.mark.usefixtures("external_clients")
 class TestDriverSwitching:
     """Tests for seamless driver switching"""
     
+    @pytest.mark.fresh_cache
     @patch('app.core.memory.manager.get_settings')
-    def test_switching_drivers_via_env(self, mock_settings):
+    def test_switching_drivers_via_env(self, mock_settings, reset_driver_caches):
         """Test that changing MEMORY_DRIVER env switches driver implementation"""
-        from app.core.memory import get_memory_driver
-        from app.core.memory.manager import MemoryDriverManager
-        
-        # Clear caches
-        get_memory_driver.cache_clear()
-        MemoryDriverManager.reset_cache()
-        
         # Set to automem
         mock_settings.return_value.MEMORY_DRIVER = "automem"
         
-        with patch('app.core.memory.automem_driver.get_default_client'):
-            driver1 = get_memory_driver()
-            driver1_type = type(driver1).__name__
+        driver1 = get_memory_driver()
+        driver1_type = type(driver1).__name__
         
         # Clear and switch to pgvector
-        get_memory_driver.cache_clear()
-        MemoryDriverManager.reset_cache()
+        reset_driver_caches()
         mock_settings.return_value.MEMORY_DRIVER = "pgvector"
         mock_settings.return_value.DATABASE_URL = "postgresql://test"
         
-        with patch('psycopg2.connect'):
-            driver2 = get_memory_driver()
-            driver2_type = type(driver2).__name__
+        driver2 = get_memory_driver()
+        driver2_type = type(driver2).__name__
         
         # Should be different driver types
         assert driver1_type == "AutoMemDriver"
@@ -305,12 +313,9 @@ class TestDriverSwitching:
     def test_agents_work_with_any_driver(self, mock_get_driver):
         """Test that agents work regardless of which driver is configured"""
         
-        # Create mock drivers
-        mock_automem = Mock()
-        mock_automem.recall.return_value = []
-        
-        mock_pgvector = Mock()
-        mock_pgvector.recall.return_value = []
+        # Create stub drivers
+        mock_automem = _StubDriver()
+        mock_pgvector = _StubDriver()
         
         state = {
             "user_input": "test",
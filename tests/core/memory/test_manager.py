@@ -5,27 +5,85 @@ Tests for the driver factory/manager system that handles driver selection
 and instantiation based on configuration.
 """
 
+import gc
 import pytest
 import os
 from unittest.mock import patch, Mock
+
+# Skip cleanly (instead of erroring at collection) where a driver module
+# cannot be imported in a minimal environment
+AutoMemDriver = pytest.importorskip("app.core.memory.automem_driver").AutoMemDriver
+PGVectorDriver = pytest.importorskip("app.core.memory.pgvector_driver").PGVectorDriver
+
 from app.core.memory.manager import (
     MemoryDriverManager, 
     get_memory_driver, 
     set_memory_driver
 )
 from app.core.memory.base import BaseMemoryDriver
-from app.core.memory.automem_driver import AutoMemDriver
-from app.core.memory.pgvector_driver import PGVectorDriver
+
+
+# External clients (AutoMem HTTP, psycopg2) are patched once for the module
+#
+# Parallel runs (pytest -n auto --dist loadgroup): tests that mutate the
+# class-level driver registry are pinned to the "registry_mutation" xdist
+# group so they share a worker; every other test only reads the registry
+# and can be scheduled freely.
+pytestmark = pytest.mark.usefixtures("external_clients")
+
+
+# (driver name, expected class)
+DRIVER_CASES = [
+    ("automem", AutoMemDriver),
+    ("pgvector", PGVectorDriver),
+]
+
+REQUIRED_METHODS = (
+    "recall",
+    "recall_global_knowledge",
+    "store",
+    "store_global_knowledge",
+    "delete",
+    "health_check",
+)
+
+
+@pytest.fixture
+def mock_settings():
+    """Patched settings object returned by the manager's get_settings()"""
+    with patch('app.core.memory.manager.get_settings') as mock_get_settings:
+        yield mock_get_settings.return_value
+
+
+class CustomDriver(BaseMemoryDriver):
+    """Minimal driver used to exercise custom registration"""
+    
+    def recall(self, *args, **kwargs):
+        return []
+    def recall_global_knowledge(self, *args, **kwargs):
+        return []
+    def store(self, *args, **kwargs):
+        return {}
+    def store_global_knowledge(self, *args, **kwargs):
+        return {}
+    def delete(self, *args, **kwargs):
+        return True
+    def health_check(self):
+        return {"status": "healthy"}
+
+
+@pytest.fixture
+def restore_registry():
+    """Restore the manager's driver registry after a test mutates it"""
+    registered = dict(MemoryDriverManager._drivers)
+    yield
+    MemoryDriverManager._drivers.clear()
+    MemoryDriverManager._drivers.update(registered)
 
 
 class TestMemoryDriverManager:
     """Test cases for MemoryDriverManager"""
     
-    def setup_method(self):
-        """Reset manager state before each test"""
-        MemoryDriverManager.reset_cache()
-        get_memory_driver.cache_clear()
-    
     def test_get_available_drivers(self):
         """Test getting list of available drivers"""
         drivers = MemoryDriverManager.get_available_drivers()
@@ -34,28 +92,15 @@ class TestMemoryDriverManager:
         assert "pgvector" in drivers
         assert len(drivers) >= 2
     
-    def test_register_custom_driver(self):
+    @pytest.mark.xdist_group("registry_mutation")
+    def test_register_custom_driver(self, restore_registry):
         """Test registering a custom driver"""
-        
-        class CustomDriver(BaseMemoryDriver):
-            def recall(self, *args, **kwargs):
-                return []
-            def recall_global_knowledge(self, *args, **kwargs):
-                return []
-            def store(self, *args, **kwargs):
-                return {}
-            def store_global_knowledge(self, *args, **kwargs):
-                return {}
-            def delete(self, *args, **kwargs):
-                return True
-            def health_check(self):
-                return {"status": "healthy"}
-        
         MemoryDriverManager.register_driver("custom", CustomDriver)
         
         drivers = MemoryDriverManager.get_available_drivers()
         assert "custom" in drivers
     
+    @pytest.mark.xdist_group("registry_mutation")
     def test_register_invalid_driver_raises_error(self):
         """Test that registering invalid driver raises ValueError"""
         
@@ -67,43 +112,37 @@ class TestMemoryDriverManager:
         
         assert "must inherit from BaseMemoryDriver" in str(exc_info.value)
     
-    @patch('app.core.memory.manager.get_settings')
     def test_get_driver_automem(self, mock_settings):
         """Test getting AutoMem driver"""
-        mock_settings.return_value.MEMORY_DRIVER = "automem"
+        mock_settings.MEMORY_DRIVER = "automem"
+        
+        driver = MemoryDriverManager.get_driver()
         
-        with patch('app.core.memory.automem_driver.get_default_client'):
-            driver = MemoryDriverManager.get_driver()
-            
-            assert isinstance(driver, AutoMemDriver)
+        assert isinstance(driver, AutoMemDriver)
     
-    @patch('app.core.memory.manager.get_settings')
     def test_get_driver_pgvector(self, mock_settings):
         """Test getting PGVector driver"""
-        mock_settings.return_value.MEMORY_DRIVER = "pgvector"
-        mock_settings.return_value.DATABASE_URL = "postgresql://test"
+        mock_settings.MEMORY_DRIVER = "pgvector"
+        mock_settings.DATABASE_URL = "postgresql://test"
         
-        with patch('psycopg2.connect'):
-            driver = MemoryDriverManager.get_driver()
-            
-            assert isinstance(driver, PGVectorDriver)
+        driver = MemoryDriverManager.get_driver()
+        
+        assert isinstance(driver, PGVectorDriver)
     
-    @patch('app.core.memory.manager.get_settings')
+    @pytest.mark.fresh_cache
     def test_get_driver_caches_instance(self, mock_settings):
         """Test that driver instances are cached"""
-        mock_settings.return_value.MEMORY_DRIVER = "automem"
-        
-        with patch('app.core.memory.automem_driver.get_default_client'):
-            driver1 = MemoryDriverManager.get_driver()
-            driver2 = MemoryDriverManager.get_driver()
-            
-            # Should return same instance
-            assert driver1 is driver2
+        mock_settings.MEMORY_DRIVER = "automem"
+        
+        driver1 = MemoryDriverManager.get_driver()
+        driver2 = MemoryDriverManager.get_driver()
+        
+        # Should return same instance
+        assert driver1 is driver2
     
-    @patch('app.core.memory.manager.get_settings')
     def test_get_driver_invalid_raises_error(self, mock_settings):
         """Test that invalid driver name raises ValueError"""
-        mock_settings.return_value.MEMORY_DRIVER = "nonexistent"
+        mock_settings.MEMORY_DRIVER = "nonexistent"
         
         with pytest.raises(ValueError) as exc_info:
             MemoryDriverManager.get_driver()
@@ -111,27 +150,23 @@ class TestMemoryDriverManager:
         assert "not found" in str(exc_info.value)
         assert "Available drivers" in str(exc_info.value)
     
-    @patch('app.core.memory.manager.get_settings')
     def test_get_driver_with_override(self, mock_settings):
         """Test overriding default driver"""
-        mock_settings.return_value.MEMORY_DRIVER = "automem"
-        mock_settings.return_value.DATABASE_URL = "postgresql://test"
-        
-        with patch('psycopg2.connect'):
-            # Override to use pgvector
-            driver = MemoryDriverManager.get_driver(driver_name="pgvector")
-            
-            assert isinstance(driver, PGVectorDriver)
+        mock_settings.MEMORY_DRIVER = "automem"
+        mock_settings.DATABASE_URL = "postgresql://test"
+        
+        # Override to use pgvector
+        driver = MemoryDriverManager.get_driver(driver_name="pgvector")
+        
+        assert isinstance(driver, PGVectorDriver)
     
-    @patch('app.core.memory.manager.get_settings')
     def test_get_driver_case_insensitive(self, mock_settings):
         """Test that driver names are case-insensitive"""
-        mock_settings.return_value.MEMORY_DRIVER = "AUTOMEM"
+        mock_settings.MEMORY_DRIVER = "AUTOMEM"
         
-        with patch('app.core.memory.automem_driver.get_default_client'):
-            driver = MemoryDriverManager.get_driver()
-            
-            assert isinstance(driver, AutoMemDriver)
+        driver = MemoryDriverManager.get_driver()
+        
+        assert isinstance(driver, AutoMemDriver)
     
     def test_reset_cache_clears_instances(self):
         """Test that reset_cache clears all cached instances"""
@@ -144,140 +179,99 @@ class TestMemoryDriverManager:
         MemoryDriverManager.reset_cache()
         
         assert len(MemoryDriverManager._instances) == 0
+    
+    def test_cache_keeps_unreferenced_driver(self, mock_settings):
+        """Test that a driver stays cached (and its pool open) after callers drop it"""
+        mock_settings.MEMORY_DRIVER = "automem"
+        
+        MemoryDriverManager.get_driver()
+        gc.collect()
+        
+        assert isinstance(MemoryDriverManager._instances.get("automem"), AutoMemDriver)
 
 
 class TestGetMemoryDriverFunction:
     """Test cases for get_memory_driver function"""
     
-    def setup_method(self):
-        """Reset cache before each test"""
-        get_memory_driver.cache_clear()
-        MemoryDriverManager.reset_cache()
-    
-    @patch('app.core.memory.manager.get_settings')
+    @pytest.mark.fresh_cache
     def test_get_memory_driver_returns_driver(self, mock_settings):
         """Test that get_memory_driver returns a driver instance"""
-        mock_settings.return_value.MEMORY_DRIVER = "automem"
+        mock_settings.MEMORY_DRIVER = "automem"
         
-        with patch('app.core.memory.automem_driver.get_default_client'):
-            driver = get_memory_driver()
-            
-            assert isinstance(driver, BaseMemoryDriver)
-            assert isinstance(driver, AutoMemDriver)
+        driver = get_memory_driver()
+        
+        assert isinstance(driver, BaseMemoryDriver)
+        assert isinstance(driver, AutoMemDriver)
     
-    @patch('app.core.memory.manager.get_settings')
+    @pytest.mark.fresh_cache
     def test_get_memory_driver_is_cached(self, mock_settings):
         """Test that get_memory_driver caches result"""
-        mock_settings.return_value.MEMORY_DRIVER = "automem"
-        
-        with patch('app.core.memory.automem_driver.get_default_client'):
-            driver1 = get_memory_driver()
-            driver2 = get_memory_driver()
-            
-            # Should return cached instance
-            assert driver1 is driver2
+        mock_settings.MEMORY_DRIVER = "automem"
+        
+        driver1 = get_memory_driver()
+        driver2 = get_memory_driver()
+        
+        # Should return cached instance
+        assert driver1 is driver2
     
-    @patch('app.core.memory.manager.get_settings')
-    def test_set_memory_driver_changes_driver(self, mock_settings):
+    @pytest.mark.fresh_cache
+    def test_set_memory_driver_changes_driver(self, mock_settings, reset_driver_caches):
         """Test that set_memory_driver can switch drivers"""
-        mock_settings.return_value.MEMORY_DRIVER = "automem"
-        mock_settings.return_value.DATABASE_URL = "postgresql://test"
+        mock_settings.MEMORY_DRIVER = "automem"
+        mock_settings.DATABASE_URL = "postgresql://test"
         
         # First get automem
-        with patch('app.core.memory.automem_driver.get_default_client'):
-            driver1 = get_memory_driver()
-            assert isinstance(driver1, AutoMemDriver)
+        driver1 = get_memory_driver()
+        assert isinstance(driver1, AutoMemDriver)
         
         # Switch to pgvector
-        with patch('psycopg2.connect'):
-            driver2 = set_memory_driver("pgvector")
-            assert isinstance(driver2, PGVectorDriver)
-            
-            # Verify subsequent get_memory_driver calls use the new cache
-            # Note: set_memory_driver updates MemoryDriverManager cache, 
-            # but get_memory_driver has its own lru_cache
-            # In practice, the app would restart or clear both caches
-            MemoryDriverManager.reset_cache()
-            get_memory_driver.cache_clear()
-            
-            with patch('psycopg2.connect'):
-                mock_settings.return_value.MEMORY_DRIVER = "pgvector"
-                driver3 = get_memory_driver()
-                assert isinstance(driver3, PGVectorDriver)
+        driver2 = set_memory_driver("pgvector")
+        assert isinstance(driver2, PGVectorDriver)
+        
+        # Verify subsequent get_memory_driver calls use the new cache
+        # Note: set_memory_driver updates MemoryDriverManager cache, 
+        # but get_memory_driver has its own lru_cache
+        # In practice, the app would restart or clear both caches
+        reset_driver_caches()
+        
+        mock_settings.MEMORY_DRIVER = "pgvector"
+        driver3 = get_memory_driver()
+        assert isinstance(driver3, PGVectorDriver)
 
 
 class TestDriverIntegration:
     """Integration tests for driver system"""
     
-    def setup_method(self):
-        """Reset state"""
-        get_memory_driver.cache_clear()
-        MemoryDriverManager.reset_cache()
-    
-    @patch('app.core.memory.manager.get_settings')
-    def test_environment_variable_switches_driver(self, mock_settings):
+    @pytest.mark.parametrize("driver_name,expected_cls", DRIVER_CASES)
+    def test_driver_by_name(self, driver_name, expected_cls, mock_settings):
         """Test that MEMORY_DRIVER env var determines which driver is used"""
+        mock_settings.MEMORY_DRIVER = driver_name
+        mock_settings.DATABASE_URL = "postgresql://test"
         
-        # Test automem
-        mock_settings.return_value.MEMORY_DRIVER = "automem"
-        with patch('app.core.memory.automem_driver.get_default_client'):
-            get_memory_driver.cache_clear()
-            driver = get_memory_driver()
-            assert isinstance(driver, AutoMemDriver)
-        
-        # Test pgvector
-        mock_settings.return_value.MEMORY_DRIVER = "pgvector"
-        mock_settings.return_value.DATABASE_URL = "postgresql://test"
-        with patch('psycopg2.connect'):
-            get_memory_driver.cache_clear()
-            MemoryDriverManager.reset_cache()
-            driver = get_memory_driver()
-            assert isinstance(driver, PGVectorDriver)
+        driver = get_memory_driver()
+        assert isinstance(driver, expected_cls)
     
-    @patch('app.core.memory.manager.get_settings')
     def test_multiple_drivers_can_coexist(self, mock_settings):
         """Test that multiple driver instances can exist simultaneously"""
-        mock_settings.return_value.DATABASE_URL = "postgresql://test"
-        
-        with patch('app.core.memory.automem_driver.get_default_client'), \
-             patch('psycopg2.connect'):
-            
-            driver1 = MemoryDriverManager.get_driver("automem")
-            driver2 = MemoryDriverManager.get_driver("pgvector")
-            
-            assert isinstance(driver1, AutoMemDriver)
-            assert isinstance(driver2, PGVectorDriver)
-            assert driver1 is not driver2
+        mock_settings.DATABASE_URL = "postgresql://test"
+        
+        driver1 = MemoryDriverManager.get_driver("automem")
+        driver2 = MemoryDriverManager.get_driver("pgvector")
+        
+        assert isinstance(driver1, AutoMemDriver)
+        assert isinstance(driver2, PGVectorDriver)
+        assert driver1 is not driver2
     
-    @patch('app.core.memory.manager.get_settings')
-    def test_driver_interface_consistency(self, mock_settings):
+    @pytest.mark.parametrize("driver_name,expected_cls", DRIVER_CASES)
+    def test_driver_interface_consistency(self, driver_name, expected_cls, mock_settings):
         """Test that all drivers implement the same interface"""
-        mock_settings.return_value.DATABASE_URL = "postgresql://test"
-        
-        with patch('app.core.memory.automem_driver.get_default_client'), \
-             patch('psycopg2.connect'):
-            
-            drivers = [
-                MemoryDriverManager.get_driver("automem"),
-                MemoryDriverManager.get_driver("pgvector")
-            ]
-            
-            for driver in drivers:
-                # All should be BaseMemoryDriver
-                assert isinstance(driver, BaseMemoryDriver)
-                
-                # All should have required methods
-                assert hasattr(driver, 'recall')
-                assert hasattr(driver, 'recall_global_knowledge')
-                assert hasattr(driver, 'store')
-                assert hasattr(driver, 'store_global_knowledge')
-                assert hasattr(driver, 'delete')
-                assert hasattr(driver, 'health_check')
-                
-                # All methods should be callable
-                assert callable(driver.recall)
-                assert callable(driver.recall_global_knowledge)
-                assert callable(driver.store)
-                assert callable(driver.store_global_knowledge)
-                assert callable(driver.delete)
-                assert callable(driver.health_check)
+        mock_settings.DATABASE_URL = "postgresql://test"
+        
+        driver = MemoryDriverManager.get_driver(driver_name)
+        
+        assert isinstance(driver, BaseMemoryDriver)
+        
+        # All required methods should exist and be callable
+        attrs = {m: getattr(driver, m, None) for m in REQUIRED_METHODS}
+        assert None not in attrs.values()
+        assert all(callable(v) for v in attrs.values())
@@ -4,91 +4,270 @@ Test PGVector Driver Implementation
 Tests for PGVectorDriver to ensure proper PostgreSQL + pgvector integration.
 """
 
+import threading
+from collections import namedtuple
+from types import SimpleNamespace
+import numpy as np
 import pytest
 from unittest.mock import Mock, patch, MagicMock, call
 from datetime import datetime
-from app.core.memory.pgvector_driver import PGVectorDriver
+from psycopg2.extras import NamedTupleCursor
+from app.core.memory.pgvector_driver import (
+    PGVectorDriver,
+    _load_model,
+    _RECALL_RECENT_SQL,
+    _KNOWLEDGE_RECALL_SQL
+)
+
+
+def _wire_connection(conn, cursor):
+    """Make conn.cursor() usable as a context manager yielding cursor"""
+    cursor.__enter__ = Mock(return_value=cursor)
+    cursor.__exit__ = Mock(return_value=False)
+    conn.cursor.return_value = cursor
+
+
+# Row shape produced by NamedTupleCursor for recall queries
+_MemoryRow = namedtuple(
+    "_MemoryRow",
+    "id user_id conversation_id content tags metadata created_at distance",
+    defaults=(None,)
+)
+
+_KnowledgeRow = namedtuple(
+    "_KnowledgeRow",
+    "id content category title doc_id tags metadata created_at distance"
+)
+
+
+def _default_embedding():
+    return np.array([0.1, 0.2, 0.3], dtype=np.float32)
+
+
+# The mocks and driver are built once per module; _reset_shared_mocks
+# restores them to a clean state before every test.
+@pytest.fixture(scope="module")
+def mock_connection():
+    """Mock database connection"""
+    conn = Mock()
+    cursor = Mock()
+    _wire_connection(conn, cursor)
+    return conn, cursor
+
+
+@pytest.fixture(scope="module")
+def mock_embedding_model():
+    """Mock embedding model"""
+    model = Mock()
+    model.encode.return_value = _default_embedding()
+    return model
+
+
+@pytest.fixture(scope="module")
+def mock_sentence_transformers(mock_embedding_model):
+    """Mock sentence_transformers module whose model is mock_embedding_model"""
+    module = Mock()
+    module.SentenceTransformer = Mock(return_value=mock_embedding_model)
+    return module
+
+
+@pytest.fixture(scope="module")
+def driver(mock_connection, mock_sentence_transformers):
+    """Create driver with mocked dependencies"""
+    with patch.dict('sys.modules', {'sentence_transformers': mock_sentence_transformers}):
+        yield PGVectorDriver(connection_string="postgresql://test")
+
+
+@pytest.fixture(scope="module")
+def mock_psycopg2():
+    """Patch the pool class, the pgvector adapter and psycopg2.connect once per module"""
+    with patch('psycopg2.pool.ThreadedConnectionPool') as pool_cls, \
+         patch('pgvector.psycopg2.register_vector') as register_vector, \
+         patch('psycopg2.connect') as connect:
+        yield SimpleNamespace(
+            ThreadedConnectionPool=pool_cls,
+            register_vector=register_vector,
+            connect=connect
+        )
 
 
 class TestPGVectorDriver:
     """Test cases for PGVectorDriver"""
     
-    @pytest.fixture
-    def mock_connection(self):
-        """Mock database connection"""
-        conn = Mock()
-        cursor = Mock()
-        cursor.__enter__ = Mock(return_value=cursor)
-        cursor.__exit__ = Mock(return_value=False)
-        conn.cursor.return_value = cursor
-        return conn, cursor
-    
-    @pytest.fixture
-    def mock_embedding_model(self):
-        """Mock embedding model"""
-        model = Mock()
-        model.encode.return_value = Mock(tolist=Mock(return_value=[0.1, 0.2, 0.3]))
-        return model
-    
-    @pytest.fixture
-    def driver(self, mock_connection, mock_embedding_model):
-        """Create driver with mocked dependencies"""
-        conn, cursor = mock_connection
+    @pytest.fixture(autouse=True)
+    def _reset_shared_mocks(self, driver, mock_connection, mock_embedding_model, mock_sentence_transformers, mock_psycopg2):
+        """Clear call history, per-test configuration and driver caches"""
+        for patched in vars(mock_psycopg2).values():
+            patched.reset_mock(return_value=True, side_effect=True)
         
-        # Mock both psycopg2 and sentence_transformers at module level
-        import sys
-        mock_sentence_transformers = Mock()
-        mock_sentence_transformers.SentenceTransformer = Mock(return_value=mock_embedding_model)
-        sys.modules['sentence_transformers'] = mock_sentence_transformers
-        
-        with patch('psycopg2.connect', return_value=conn):
-            driver = PGVectorDriver(connection_string="postgresql://test")
-            # Force connection initialization with our mock
-            driver._connection = conn
-            driver._embedding_model = mock_embedding_model
-            return driver
+        conn, cursor = mock_connection
+        conn.reset_mock(return_value=True, side_effect=True)
+        cursor.reset_mock(return_value=True, side_effect=True)
+        _wire_connection(conn, cursor)
+        
+        mock_embedding_model.reset_mock(return_value=True, side_effect=True)
+        mock_embedding_model.encode.return_value = _default_embedding()
+        mock_sentence_transformers.reset_mock()
+        
+        # Force pool initialization with our mock connection; the embedding
+        # model is left to load lazily, as it does in production
+        driver._pool = Mock(getconn=Mock(return_value=conn))
+        driver._embedding_model = None
+        driver._embedding_cache.clear()
+        driver._prepared_connections.clear()
+        # As detected on pgvector >= 0.8
+        driver._iterative_scan = True
+        _load_model.cache_clear()
+        yield
+        _load_model.cache_clear()
     
     def test_initialization(self):
         """Test driver initialization"""
         driver = PGVectorDriver(connection_string="postgresql://test")
         assert driver is not None
         assert driver._connection_string == "postgresql://test"
-        assert driver._connection is None
+        assert driver._pool is None
         assert driver._embedding_model is None
     
-    def test_get_connection_creates_extension(self, mock_connection):
-        """Test that connection setup creates pgvector extension"""
+    def test_get_connection_creates_extension(self, mock_connection, mock_psycopg2):
+        """Test that pool setup creates pgvector extension"""
         conn, cursor = mock_connection
+        cursor.fetchone.return_value = {"extversion": "0.8.0"}
+        mock_pool = Mock(getconn=Mock(return_value=conn))
+        mock_psycopg2.ThreadedConnectionPool.return_value = mock_pool
         
-        with patch('psycopg2.connect', return_value=conn):
-            driver = PGVectorDriver(connection_string="postgresql://test")
-            connection = driver._get_connection()
-            
-            # Verify extension was created
-            cursor.execute.assert_called_with("CREATE EXTENSION IF NOT EXISTS vector;")
-            conn.commit.assert_called()
+        driver = PGVectorDriver(connection_string="postgresql://test")
+        with driver._get_connection() as connection:
             assert connection is conn
+        
+        # Pool is bounded and created once
+        assert mock_psycopg2.ThreadedConnectionPool.call_args[0][:3] == (2, 16, "postgresql://test")
+        
+        # Verify the extension was created; indexes are left to migrations
+        executed = [c.args[0] for c in cursor.execute.call_args_list]
+        assert executed[0] == "CREATE EXTENSION IF NOT EXISTS vector;"
+        assert "FROM pg_extension" in executed[1]
+        assert driver._iterative_scan is True
+        assert not any("CREATE INDEX" in sql for sql in executed)
+        conn.commit.assert_called()
+        
+        # numpy embeddings are adapted for all pooled connections
+        mock_psycopg2.register_vector.assert_called_once_with(conn, globally=True)
+        
+        # Every borrowed connection goes back to the pool
+        assert mock_pool.putconn.call_count == mock_pool.getconn.call_count
     
-    def test_get_connection_uses_settings_if_no_string(self, mock_connection):
+    def test_connections_only_come_from_pool(self, driver, mock_connection, mock_embedding_model, mock_psycopg2):
+        """Test that driver operations never open a direct psycopg2 connection"""
+        conn, cursor = mock_connection
+        cursor.fetchall.return_value = []
+        
+        driver.recall(user_id="user123", query="test", use_vector=True)
+        driver.recall_global_knowledge(query="test")
+        driver.delete(memory_id="mem1")
+        
+        assert mock_psycopg2.connect.called is False
+        assert driver._pool.getconn.call_count == 3
+    
+    @pytest.mark.parametrize("extversion, iterative_scan", [("0.8.0", True), ("0.7.4", False)])
+    def test_get_connection_uses_settings_if_no_string(self, mock_connection, mock_psycopg2,
+                                                       extversion, iterative_scan):
         """Test that connection uses settings when no string provided"""
         conn, cursor = mock_connection
+        cursor.fetchone.return_value = {"extversion": extversion}
+        mock_psycopg2.ThreadedConnectionPool.return_value = Mock(getconn=Mock(return_value=conn))
         
-        with patch('psycopg2.connect', return_value=conn), \
-             patch('config.settings.get_settings') as mock_settings:
+        with patch('config.settings.get_settings') as mock_settings:
             mock_settings.return_value.DATABASE_URL = "postgresql://from_settings"
             
             driver = PGVectorDriver()
-            driver._get_connection()
+            driver._get_pool()
             
             # Should use settings URL
             mock_settings.assert_called_once()
+            assert driver._connection_string == "postgresql://from_settings"
+            assert driver._iterative_scan is iterative_scan
+    
+    def test_concurrent_recalls_use_distinct_connections(self, driver, mock_embedding_model):
+        """Test that concurrent recall calls each borrow their own pooled connection"""
+        barrier = threading.Barrier(2, timeout=5)
+        
+        def fetchall():
+            # Both calls must hold a connection at the same time to get past here
+            barrier.wait()
+            return []
+        
+        connections = []
+        for _ in range(2):
+            conn = Mock()
+            cursor = Mock()
+            cursor.__enter__ = Mock(return_value=cursor)
+            cursor.__exit__ = Mock(return_value=False)
+            cursor.fetchall = Mock(side_effect=fetchall)
+            conn.cursor.return_value = cursor
+            connections.append(conn)
+        driver._pool = Mock(getconn=Mock(side_effect=connections))
+        
+        threads = [
+            threading.Thread(target=driver.recall, kwargs={"user_id": "user123"})
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        assert not barrier.broken
+        assert driver._pool.getconn.call_count == 2
+        returned = [c.args[0] for c in driver._pool.putconn.call_args_list]
+        assert sorted(map(id, returned)) == sorted(map(id, connections))
     
     def test_generate_embedding(self, driver, mock_embedding_model):
         """Test embedding generation"""
         embedding = driver._generate_embedding("test text")
         
-        mock_embedding_model.encode.assert_called_once_with("test text")
-        assert embedding == [0.1, 0.2, 0.3]
+        mock_embedding_model.encode.assert_called_once_with(
+            "test text", convert_to_numpy=True, normalize_embeddings=True
+        )
+        # The encoder's array is passed through as-is (no .tolist() round-trip)
+        assert isinstance(embedding, np.ndarray)
+        assert embedding is mock_embedding_model.encode.return_value
+    
+    def test_embedding_model_is_shared(self):
+        """Test that driver instances share one loaded embedding model"""
+        mock_sentence_transformers = Mock()
+        _load_model.cache_clear()
+        try:
+            with patch.dict('sys.modules', {'sentence_transformers': mock_sentence_transformers}):
+                d1 = PGVectorDriver(connection_string="postgresql://test")
+                d2 = PGVectorDriver(connection_string="postgresql://test")
+                d1._get_embedding_model()
+                d2._get_embedding_model()
+        finally:
+            _load_model.cache_clear()
+        
+        assert d1._embedding_model is d2._embedding_model
+        mock_sentence_transformers.SentenceTransformer.assert_called_once_with('all-MiniLM-L6-v2')
+    
+    def test_embedding_model_lazy_initialized(self, driver, mock_embedding_model, mock_sentence_transformers):
+        """Test that the embedding model is not loaded until the first encode"""
+        assert driver._embedding_model is None
+        assert mock_sentence_transformers.SentenceTransformer.called is False
+        
+        driver._generate_embedding("test text")
+        
+        assert driver._embedding_model is mock_embedding_model
+        mock_sentence_transformers.SentenceTransformer.assert_called_once_with('all-MiniLM-L6-v2')
+    
+    def test_recall_chronological_no_model_load(self, driver, mock_connection, mock_sentence_transformers):
+        """Test that recall without vector search never loads the embedding model"""
+        conn, cursor = mock_connection
+        cursor.fetchall.return_value = []
+        
+        driver.recall(user_id="user123", query="test", use_vector=False)
+        
+        assert mock_sentence_transformers.SentenceTransformer.called is False
+        assert driver._embedding_model is None
     
     def test_recall_with_vector_search(self, driver, mock_connection, mock_embedding_model):
         """Test recalling memories with vector similarity search"""
@@ -96,16 +275,16 @@ class TestPGVectorDriver:
         
         # Mock database results
         cursor.fetchall.return_value = [
-            {
-                "id": "mem1",
-                "user_id": "user123",
-                "conversation_id": "conv1",
-                "content": "Test memory",
-                "tags": ["user"],
-                "metadata": {},
-                "created_at": datetime(2026, 1, 1),
-                "distance": 0.1
-            }
+            _MemoryRow(
+                id="mem1",
+                user_id="user123",
+                conversation_id="conv1",
+                content="Test memory",
+                tags=["user"],
+                metadata={},
+                created_at=datetime(2026, 1, 1),
+                distance=0.1
+            )
         ]
         
         result = driver.recall(
@@ -116,16 +295,20 @@ class TestPGVectorDriver:
             use_vector=True
         )
         
-        # Verify SQL was executed
-        cursor.execute.assert_called_once()
+        # Verify prepared statement was executed (after PREPARE and planner settings)
+        assert cursor.execute.call_count == 5
+        prepare_sql = cursor.execute.call_args_list[0][0][0]
         sql_call = cursor.execute.call_args[0][0]
         params = cursor.execute.call_args[0][1]
         
-        assert "embedding <=> %s::vector" in sql_call
-        assert "user_id = %s" in sql_call
-        assert "conversation_id = %s" in sql_call
+        assert "PREPARE recall_vec (halfvec," in prepare_sql
+        assert "embedding <#> $1" in prepare_sql
+        assert "user_id = $2" in prepare_sql
+        assert "conversation_id = $3" in prepare_sql
+        assert sql_call == "EXECUTE recall_vec (%s::halfvec, %s, %s, %s, %s)"
         assert params[1] == "user123"
         assert params[2] == "conv1"
+        assert params[4] == 5
         
         # Verify result format
         assert len(result) == 1
@@ -133,20 +316,112 @@ class TestPGVectorDriver:
         assert result[0]["memory"]["content"] == "Test memory"
         assert result[0]["user_id"] == "user123"
     
+    def test_recall_uses_namedtuple_cursor(self, driver, mock_connection, mock_embedding_model):
+        """Test that recall reads rows as namedtuples instead of dicts"""
+        conn, cursor = mock_connection
+        cursor.fetchall.return_value = []
+        
+        driver.recall(user_id="user123", query="test", use_vector=True)
+        driver.recall(user_id="user123", use_vector=False)
+        
+        assert conn.cursor.call_args_list == [call(cursor_factory=NamedTupleCursor)] * 2
+    
+    def test_recall_sets_ef_search(self, driver, mock_connection, mock_embedding_model):
+        """Test that vector recall tunes hnsw.ef_search before the SELECT"""
+        conn, cursor = mock_connection
+        cursor.fetchall.return_value = []
+        
+        driver.recall(user_id="user123", query="test", top_k=100, use_vector=True)
+        
+        prepare, seqscan, iterative, ef_search, select = cursor.execute.call_args_list
+        assert prepare.args[0].lstrip().startswith("PREPARE")
+        assert seqscan.args == ("SET LOCAL enable_seqscan = off",)
+        assert iterative.args == ("SET LOCAL hnsw.iterative_scan = strict_order",)
+        assert ef_search.args == ("SET LOCAL hnsw.ef_search = %s", (100,))
+        assert select.args[0].startswith("EXECUTE")
+    
+    def test_recall_global_knowledge_sets_planner_settings(self, driver, mock_connection, mock_embedding_model):
+        """Test that knowledge recall issues the HNSW planner settings before its SELECT"""
+        conn, cursor = mock_connection
+        cursor.fetchall.return_value = []
+        
+        driver.recall_global_knowledge(query="test", top_k=5)
+        
+        assert cursor.execute.call_args_list[:3] == [
+            call("SET LOCAL enable_seqscan = off"),
+            call("SET LOCAL hnsw.iterative_scan = strict_order"),
+            call("SET LOCAL hnsw.ef_search = %s", (40,)),
+        ]
+        assert cursor.execute.call_args_list[3].args[0] is _KNOWLEDGE_RECALL_SQL[False]
+    
+    @pytest.mark.parametrize("extversion", ["0.7.4", "0.5.1"])
+    def test_iterative_scan_disabled_before_pgvector_0_8(self, mock_connection, mock_psycopg2, extversion):
+        """Test that pgvector < 0.8 never receives the hnsw.iterative_scan setting"""
+        conn, cursor = mock_connection
+        cursor.fetchone.return_value = {"extversion": extversion}
+        cursor.fetchall.return_value = []
+        mock_psycopg2.ThreadedConnectionPool.return_value = Mock(getconn=Mock(return_value=conn))
+        
+        driver = PGVectorDriver(connection_string="postgresql://test")
+        driver._embedding_model = Mock(encode=Mock(return_value=_default_embedding()))
+        driver.recall(user_id="user123", query="test", use_vector=True)
+        
+        executed = [c.args[0] for c in cursor.execute.call_args_list]
+        assert driver._iterative_scan is False
+        assert not any("iterative_scan" in sql for sql in executed)
+        assert executed[-1].startswith("EXECUTE recall_vec")
+    
+    def test_recall_widens_ef_search_for_exclusions(self, driver, mock_connection, mock_embedding_model):
+        """Test that excluding tags over-fetches HNSW candidates to fill top_k"""
+        conn, cursor = mock_connection
+        cursor.fetchall.return_value = []
+        
+        driver.recall(user_id="user123", query="test", top_k=20, exclude_tags=["conversation_conv1"])
+        
+        assert call("SET LOCAL hnsw.ef_search = %s", (80,)) in cursor.execute.call_args_list
+    
+    def test_large_top_k_caps_ef_search(self, driver, mock_connection, mock_embedding_model):
+        """Test that ef_search never exceeds pgvector's limit of 1000"""
+        conn, cursor = mock_connection
+        cursor.fetchall.return_value = []
+        
+        driver.recall(user_id="user123", query="test", top_k=300, exclude_tags=["conversation_conv1"])
+        driver.recall_global_knowledge(query="test", top_k=1500)
+        
+        ef_search = [c.args[1] for c in cursor.execute.call_args_list if "hnsw.ef_search" in c.args[0]]
+        assert ef_search == [(1000,), (1000,)]
+    
+    def test_recall_prepares_statement_once_per_connection(self, driver, mock_connection, mock_embedding_model):
+        """Test that PREPARE is issued once and later recalls only EXECUTE"""
+        conn, cursor = mock_connection
+        cursor.fetchall.return_value = []
+        
+        driver.recall(user_id="user123", query="first", use_vector=True)
+        driver.recall(user_id="user123", query="second", use_vector=True)
+        
+        executed = [c.args[0] for c in cursor.execute.call_args_list]
+        assert sum(sql.lstrip().startswith("PREPARE") for sql in executed) == 1
+        assert sum(sql.startswith("EXECUTE recall_vec") for sql in executed) == 2
+        
+        # Optional filters are passed as NULL rather than changing the statement
+        params = cursor.execute.call_args[0][1]
+        assert params[2] is None
+        assert params[3] is None
+    
     def test_recall_chronological(self, driver, mock_connection):
         """Test recalling memories chronologically without vector search"""
         conn, cursor = mock_connection
         
         cursor.fetchall.return_value = [
-            {
-                "id": "mem1",
-                "user_id": "user123",
-                "conversation_id": None,
-                "content": "Recent memory",
-                "tags": [],
-                "metadata": {},
-                "created_at": datetime(2026, 1, 1)
-            }
+            _MemoryRow(
+                id="mem1",
+                user_id="user123",
+                conversation_id=None,
+                content="Recent memory",
+                tags=[],
+                metadata={},
+                created_at=datetime(2026, 1, 1)
+            )
         ]
         
         result = driver.recall(
@@ -163,6 +438,44 @@ class TestPGVectorDriver:
         
         assert len(result) == 1
     
+    @pytest.mark.parametrize("conversation_id,exclude_tags", [
+        (None, None),
+        ("conv1", None),
+        (None, ["archived"]),
+        ("conv1", ["archived"]),
+    ])
+    def test_recall_chronological_uses_prebuilt_sql(self, driver, mock_connection, conversation_id, exclude_tags):
+        """Test that chronological recall reuses a query built at import time"""
+        conn, cursor = mock_connection
+        cursor.fetchall.return_value = []
+        
+        driver.recall(
+            user_id="user123",
+            conversation_id=conversation_id,
+            use_vector=False,
+            exclude_tags=exclude_tags
+        )
+        
+        assert len(_RECALL_RECENT_SQL) == 4
+        sql_call, params = cursor.execute.call_args[0]
+        assert sql_call is _RECALL_RECENT_SQL[(conversation_id is not None, exclude_tags is not None)]
+        assert sql_call.count("%s") == len(params)
+    
+    def test_recall_global_knowledge_uses_prebuilt_sql(self, driver, mock_connection, mock_embedding_model):
+        """Test that knowledge recall reuses a query built at import time"""
+        conn, cursor = mock_connection
+        cursor.fetchall.return_value = []
+        
+        driver.recall_global_knowledge(query="test")
+        driver.recall_global_knowledge(query="test", category="Policies")
+        
+        first, second = (
+            c.args[0] for c in cursor.execute.call_args_list
+            if not c.args[0].startswith("SET LOCAL")
+        )
+        assert first is _KNOWLEDGE_RECALL_SQL[False]
+        assert second is _KNOWLEDGE_RECALL_SQL[True]
+    
     def test_recall_with_exclude_tags(self, driver, mock_connection, mock_embedding_model):
         """Test recalling with tag exclusion"""
         conn, cursor = mock_connection
@@ -175,28 +488,49 @@ class TestPGVectorDriver:
             exclude_tags=["conversation_conv1", "archived"]
         )
         
-        sql_call = cursor.execute.call_args[0][0]
+        prepare_sql = cursor.execute.call_args_list[0][0][0]
         params = cursor.execute.call_args[0][1]
         
-        assert "NOT tags && %s" in sql_call
-        assert ["conversation_conv1", "archived"] in params
+        assert "NOT tags && $4" in prepare_sql
+        assert params[3] == ["conversation_conv1", "archived"]
+    
+    def test_vector_queries_use_inner_product(self, driver, mock_connection, mock_embedding_model):
+        """Test that recall queries rank normalized embeddings by inner product"""
+        conn, cursor = mock_connection
+        cursor.fetchall.return_value = []
+        
+        driver.recall(user_id="user123", query="test", use_vector=True)
+        driver.recall_global_knowledge(query="test")
+        
+        vector_sql = [
+            c.args[0] for c in cursor.execute.call_args_list
+            if "PREPARE" in c.args[0] or "FROM global_knowledge" in c.args[0]
+        ]
+        assert len(vector_sql) == 2
+        for sql in vector_sql:
+            assert "<#>" in sql
+            assert "<=>" not in sql
+        
+        # Embeddings are unit-normalized by the encoder before being sent
+        for encode_call in mock_embedding_model.encode.call_args_list:
+            assert encode_call.kwargs["normalize_embeddings"] is True
     
     def test_recall_global_knowledge(self, driver, mock_connection, mock_embedding_model):
         """Test recalling global knowledge documents"""
         conn, cursor = mock_connection
         
         cursor.fetchall.return_value = [
-            {
-                "id": "doc1",
-                "content": "Policy document",
-                "category": "policies",
-                "title": "Policy 1",
-                "doc_id": "POL-001",
-                "tags": ["category_policies"],
-                "metadata": {},
-                "created_at": datetime(2026, 1, 1),
-                "distance": 0.2
-            }
+            _KnowledgeRow(
+                id="doc1",
+                content="Policy document",
+                category="policies",
+                title="Policy 1",
+                doc_id="POL-001",
+                tags=["category_policies"],
+                metadata={},
+                created_at=datetime(2026, 1, 1),
+                distance=0.2
+            )
         ]
         
         result = driver.recall_global_knowledge(
@@ -211,10 +545,14 @@ class TestPGVectorDriver:
         
         assert "FROM global_knowledge" in sql_call
         assert "category = %s" in sql_call
-        assert "policies" in params
+        assert params[1] == "policies"
+        
+        # Rows are read as namedtuples and handed back as plain dicts
+        conn.cursor.assert_called_once_with(cursor_factory=NamedTupleCursor)
         
         # Verify result
         assert len(result) == 1
+        assert type(result[0]) is dict
         assert result[0]["memory"]["content"] == "Policy document"
         assert result[0]["memory"]["metadata"]["category"] == "policies"
         assert result[0]["memory"]["metadata"]["title"] == "Policy 1"
@@ -257,6 +595,74 @@ class TestPGVectorDriver:
         assert result["id"] == "mem123"
         assert result["memory"]["content"] == "New memory"
     
+    def test_store_reuses_cached_embedding(self, driver, mock_connection, mock_embedding_model):
+        """Test that storing the same content twice encodes it only once"""
+        conn, cursor = mock_connection
+        cursor.fetchone.return_value = None
+        
+        driver.store(user_id="user123", content="same")
+        driver.store(user_id="user123", content="same")
+        
+        assert mock_embedding_model.encode.call_count == 1
+        assert cursor.execute.call_count == 2
+    
+    def test_generate_embeddings_batch_larger_than_cache(self, driver, mock_embedding_model):
+        """Test that a batch with more distinct texts than the cache holds returns every vector"""
+        texts = ["a", "b", "c", "d", "a"]
+        mock_embedding_model.encode.return_value = np.arange(12, dtype=np.float32).reshape(4, 3)
+        
+        with patch('app.core.memory.pgvector_driver._EMBEDDING_CACHE_SIZE', 2):
+            embeddings = driver._generate_embeddings(texts)
+        
+        assert [row[0] for row in embeddings] == [0.0, 3.0, 6.0, 9.0, 0.0]
+        assert mock_embedding_model.encode.call_args[0][0] == ["a", "b", "c", "d"]
+        assert len(driver._embedding_cache) == 2
+    
+    def test_embedding_cache_is_thread_safe(self, driver, mock_embedding_model):
+        """Test that concurrent lookups and evictions on a small cache never fail"""
+        errors = []
+        
+        def worker(offset):
+            try:
+                for i in range(200):
+                    driver._generate_embedding(f"text {(offset + i) % 8}")
+            except Exception as e:
+                errors.append(e)
+        
+        with patch('app.core.memory.pgvector_driver._EMBEDDING_CACHE_SIZE', 4):
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=10)
+        
+        assert errors == []
+        assert len(driver._embedding_cache) <= 4
+    
+    def test_store_many_batches_encode(self, driver, mock_connection, mock_embedding_model):
+        """Test that store_many encodes all contents in one batched call"""
+        conn, cursor = mock_connection
+        items = [
+            {"user_id": "user123", "content": f"Memory {i}", "tags": ["user"]}
+            for i in range(5)
+        ]
+        mock_embedding_model.encode.return_value = np.full((len(items), 3), 0.1, dtype=np.float32)
+        
+        with patch('psycopg2.extras.execute_values', return_value=[]) as mock_execute_values:
+            result = driver.store_many(items)
+        
+        assert mock_embedding_model.encode.call_count == 1
+        texts = mock_embedding_model.encode.call_args[0][0]
+        assert texts == [item["content"] for item in items]
+        assert mock_embedding_model.encode.call_args[1]["batch_size"] == 64
+        assert mock_embedding_model.encode.call_args[1]["normalize_embeddings"] is True
+        
+        # One bulk INSERT carrying every row
+        mock_execute_values.assert_called_once()
+        assert len(mock_execute_values.call_args[0][2]) == len(items)
+        conn.commit.assert_called_once()
+        assert result == []
+    
     def test_store_global_knowledge(self, driver, mock_connection, mock_embedding_model):
         """Test storing global knowledge"""
         conn, cursor = mock_connection
@@ -290,6 +696,47 @@ class TestPGVectorDriver:
         
         assert result["id"] == "doc1"
     
+    def test_store_global_knowledge_bulk_uses_copy(self, driver, mock_connection, mock_embedding_model):
+        """Test that bulk knowledge ingestion COPYs all documents at once"""
+        conn, cursor = mock_connection
+        docs = [
+            {"content": f"Policy {i}", "category": "Policies", "title": f"Policy {i}", "doc_id": f"POL-{i:03d}"}
+            for i in range(5)
+        ]
+        mock_embedding_model.encode.return_value = np.full((len(docs), 3), 0.1, dtype=np.float32)
+        cursor.fetchall.return_value = []
+        
+        driver.store_global_knowledge_bulk(docs)
+        
+        assert mock_embedding_model.encode.call_count == 1
+        cursor.copy_expert.assert_called_once()
+        copy_sql, buffer = cursor.copy_expert.call_args[0]
+        assert copy_sql.startswith("COPY tmp_global_knowledge")
+        
+        rows = buffer.getvalue().splitlines()
+        assert len(rows) == len(docs)
+        assert rows[0].startswith("Policy 0,policies,Policy 0,POL-000,")
+        
+        upsert_sql = cursor.execute.call_args[0][0]
+        assert "ON CONFLICT (doc_id) DO UPDATE" in upsert_sql
+        conn.commit.assert_called_once()
+    
+    def test_store_global_knowledge_bulk_keeps_last_duplicate(self, driver, mock_connection, mock_embedding_model):
+        """Test that repeated doc_ids in one batch collapse to the last entry"""
+        conn, cursor = mock_connection
+        mock_embedding_model.encode.return_value = np.full((1, 3), 0.1, dtype=np.float32)
+        cursor.fetchall.return_value = []
+        
+        driver.store_global_knowledge_bulk([
+            {"content": "Old", "category": "policies", "doc_id": "POL-001"},
+            {"content": "New", "category": "policies", "doc_id": "POL-001"},
+        ])
+        
+        buffer = cursor.copy_expert.call_args[0][1]
+        rows = buffer.getvalue().splitlines()
+        assert len(rows) == 1
+        assert rows[0].startswith("New,")
+    
     def test_delete_memory(self, driver, mock_connection):
         """Test deleting a memory"""
         conn, cursor = mock_connection
@@ -336,16 +783,17 @@ class TestPGVectorDriver:
         assert result["tables"]["memories"] is True
         assert result["tables"]["global_knowledge"] is True
     
-    def test_health_check_failure(self):
+    def test_health_check_failure(self, mock_psycopg2):
         """Test health check when connection fails"""
-        with patch('psycopg2.connect', side_effect=Exception("Connection failed")):
-            driver = PGVectorDriver(connection_string="postgresql://invalid")
-            result = driver.health_check()
-            
-            assert result["status"] == "unhealthy"
-            assert result["driver"] == "pgvector"
-            assert result["connected"] is False
-            assert "Connection failed" in result["error"]
+        mock_psycopg2.ThreadedConnectionPool.side_effect = Exception("Connection failed")
+        
+        driver = PGVectorDriver(connection_string="postgresql://invalid")
+        result = driver.health_check()
+        
+        assert result["status"] == "unhealthy"
+        assert result["driver"] == "pgvector"
+        assert result["connected"] is False
+        assert "Connection failed" in result["error"]
     
     def test_recall_handles_errors(self, driver, mock_connection):
         """Test that recall handles database errors gracefully"""
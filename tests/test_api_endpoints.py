@@ -4,9 +4,44 @@ Testing REST API endpoints with FastAPI TestClient
 """
 
 import pytest
+from datetime import datetime
 from unittest.mock import Mock, patch
-from fastapi.testclient import TestClient
-from server import app
+from app.controllers.persona_controller import PersonaController
+
+
+# Controller payloads shared by tests; built once at import time and
+# copied (not mutated) where a test needs different values
+_FIXED_NOW = datetime(2024, 1, 1)
+
+_QUERY_RESPONSE_TEMPLATE = {
+    "query": "What is AI?",
+    "response": "Test response",
+    "agents_used": ["general"],
+    "agent_responses": [{"agent": "general", "response": "Test response", "metadata": {}}],
+    "metadata": {},
+    "conversation_id": 1,
+    "created_at": _FIXED_NOW
+}
+
+_FEEDBACK_RESPONSE = {
+    "feedback_id": 1,
+    "status": "success",
+    "message": "Feedback submitted successfully"
+}
+
+_PERSONA_RESPONSE = {
+    "id": 1,
+    "user_id": 1,
+    "communication_style": "professional",
+    "detail_level": "detailed",
+    "preferred_agents": ["research", "writing"],
+    "expertise_level": "intermediate",
+    "interests": ["AI", "technology"],
+    "interaction_count": 10,
+    "learning_data": {},
+    "created_at": _FIXED_NOW,
+    "updated_at": _FIXED_NOW
+}
 
 
 @pytest.mark.integration
@@ -14,11 +49,9 @@ from server import app
 class TestQueryEndpoint:
     """Test suite for /api/query endpoint"""
     
-    def test_query_endpoint_requires_authentication(self):
+    def test_query_endpoint_requires_authentication(self, app_client):
         """Test query endpoint requires authentication"""
-        client = TestClient(app)
-        
-        response = client.post("/api/query", json={
+        response = app_client.post("/api/query", json={
             "query": "Test query",
             "context": {},
             "conversation_id": None
@@ -30,16 +63,7 @@ class TestQueryEndpoint:
     @patch('app.controllers.query_controller.QueryController.process_query')
     def test_query_endpoint_success(self, mock_process_query, app_client, auth_headers):
         """Test successful query processing"""
-        from datetime import datetime
-        mock_process_query.return_value = {
-            "query": "What is AI?",
-            "response": "Test response",
-            "agents_used": ["general"],
-            "agent_responses": [{"agent": "general", "response": "Test response", "metadata": {}}],
-            "metadata": {},
-            "conversation_id": 1,
-            "created_at": datetime.utcnow()
-        }
+        mock_process_query.return_value = _QUERY_RESPONSE_TEMPLATE
         
         response = app_client.post(
             "/api/query",
@@ -59,15 +83,10 @@ class TestQueryEndpoint:
     @patch('app.controllers.query_controller.QueryController.process_query')
     def test_query_endpoint_with_conversation_id(self, mock_process_query, app_client, auth_headers):
         """Test query with existing conversation"""
-        from datetime import datetime
         mock_process_query.return_value = {
+            **_QUERY_RESPONSE_TEMPLATE,
             "query": "Continue the conversation",
-            "response": "Follow-up response",
-            "agents_used": ["general"],
-            "agent_responses": [{"agent": "general", "response": "Follow-up response", "metadata": {}}],
-            "metadata": {},
-            "conversation_id": 5,
-            "created_at": datetime.utcnow()
+            "conversation_id": 5
         }
         
         response = app_client.post(
@@ -104,27 +123,23 @@ class TestQueryEndpoint:
 class TestConversationEndpoints:
     """Test suite for conversation management endpoints"""
     
+    # Controller payloads, built once with the class; the routes only read them
+    CONVERSATION_DETAIL = {
+        "id": 1,
+        "title": "Test Conversation",
+        "messages": [
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": "Hi there!"}
+        ],
+        "created_at": "2024-01-01T00:00:00",
+        "updated_at": "2024-01-01T00:00:00"
+    }
+    DELETE_RESULT = {"message": "Conversation deleted"}
+    
     @patch('app.controllers.conversation_controller.ConversationController.list_conversations')
-    def test_list_conversations(self, mock_list, app_client, auth_headers):
+    def test_list_conversations(self, mock_list, app_client, auth_headers, conversation_list_response):
         """Test listing user conversations"""
-        mock_list.return_value = [
-            {
-                "id": 1,
-                "title": "First Conversation",
-                "last_query": "What is AI?",
-                "message_count": 5,
-                "created_at": "2024-01-01T00:00:00",
-                "updated_at": "2024-01-01T00:00:00"
-            },
-            {
-                "id": 2,
-                "title": "Second Conversation",
-                "last_query": "Write code",
-                "message_count": 3,
-                "created_at": "2024-01-02T00:00:00",
-                "updated_at": "2024-01-02T00:00:00"
-            }
-        ]
+        mock_list.return_value = conversation_list_response
         
         response = app_client.get("/api/conversations", headers=auth_headers)
         
@@ -150,16 +165,7 @@ class TestConversationEndpoints:
     @patch('app.controllers.conversation_controller.ConversationController.get_conversation')
     def test_get_conversation_detail(self, mock_get, app_client, auth_headers):
         """Test getting conversation detail"""
-        mock_get.return_value = {
-            "id": 1,
-            "title": "Test Conversation",
-            "messages": [
-                {"role": "user", "content": "Hello"},
-                {"role": "assistant", "content": "Hi there!"}
-            ],
-            "created_at": "2024-01-01T00:00:00",
-            "updated_at": "2024-01-01T00:00:00"
-        }
+        mock_get.return_value = self.CONVERSATION_DETAIL
         
         response = app_client.get("/api/conversations/1", headers=auth_headers)
         
@@ -178,7 +184,7 @@ class TestConversationEndpoints:
     @patch('app.controllers.conversation_controller.ConversationController.delete_conversation')
     def test_delete_conversation(self, mock_delete, app_client, auth_headers):
         """Test deleting a conversation"""
-        mock_delete.return_value = {"message": "Conversation deleted"}
+        mock_delete.return_value = self.DELETE_RESULT
         
         response = app_client.delete("/api/conversations/1", headers=auth_headers)
         
@@ -191,21 +197,21 @@ class TestConversationEndpoints:
 class TestFeedbackEndpoint:
     """Test suite for /api/feedback endpoint"""
     
+    @pytest.mark.parametrize("action,reason", [
+        ("accept", "Great response!"),
+        ("reject", "Not accurate"),
+    ])
     @patch('app.controllers.feedback_controller.FeedbackController.submit_feedback')
-    def test_submit_feedback(self, mock_submit, app_client, auth_headers):
-        """Test submitting feedback"""
-        mock_submit.return_value = {
-            "feedback_id": 1,
-            "status": "success",
-            "message": "Feedback submitted successfully"
-        }
+    def test_submit_feedback(self, mock_submit, action, reason, app_client, auth_headers):
+        """Test submitting accept and reject feedback"""
+        mock_submit.return_value = _FEEDBACK_RESPONSE
         
         response = app_client.post(
             "/api/feedback",
             json={
                 "conversation_id": 1,
-                "action": "accept",
-                "reason": "Great response!"
+                "action": action,
+                "reason": reason
             },
             headers=auth_headers
         )
@@ -213,27 +219,6 @@ class TestFeedbackEndpoint:
         assert response.status_code == 201
         data = response.json()
         assert data["message"] == "Feedback submitted successfully"
-    
-    @patch('app.controllers.feedback_controller.FeedbackController.submit_feedback')
-    def test_submit_feedback_validates_rating(self, mock_submit, app_client, auth_headers):
-        """Test feedback submission with valid action"""
-        mock_submit.return_value = {
-            "feedback_id": 2,
-            "status": "success",
-            "message": "Feedback submitted successfully"
-        }
-        
-        response = app_client.post(
-            "/api/feedback",
-            json={
-                "conversation_id": 1,
-                "action": "reject",
-                "reason": "Not accurate"
-            },
-            headers=auth_headers
-        )
-        
-        assert response.status_code == 201
 
 
 @pytest.mark.integration
@@ -241,60 +226,21 @@ class TestFeedbackEndpoint:
 class TestPersonaEndpoint:
     """Test suite for /api/persona endpoint"""
     
-    @patch('app.controllers.persona_controller.PersonaController.get_persona')
-    def test_get_persona(self, mock_get, app_client, auth_headers):
-        """Test getting user persona"""
-        from datetime import datetime
-        mock_get.return_value = {
-            "id": 1,
-            "user_id": 1,
-            "communication_style": "professional",
-            "detail_level": "detailed",
-            "preferred_agents": ["research", "writing"],
-            "expertise_level": "intermediate",
-            "interests": ["AI", "technology"],
-            "interaction_count": 10,
-            "learning_data": {},
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
-        
-        response = app_client.get("/api/persona", headers=auth_headers)
+    @pytest.mark.parametrize("http_method,controller_method,body,style", [
+        ("GET", "get_persona", None, "professional"),
+        ("PUT", "update_persona", {"communication_style": "casual", "detail_level": "concise"}, "casual"),
+    ])
+    def test_persona_endpoint(self, http_method, controller_method, body, style, app_client, auth_headers):
+        """Test reading and updating the user persona"""
+        with patch.object(PersonaController, controller_method) as mock_controller:
+            mock_controller.return_value = {**_PERSONA_RESPONSE, "communication_style": style}
+            
+            response = app_client.request(http_method, "/api/persona", json=body, headers=auth_headers)
         
         assert response.status_code == 200
         data = response.json()
-        assert data["communication_style"] == "professional"
-    
-    @patch('app.controllers.persona_controller.PersonaController.update_persona')
-    def test_update_persona(self, mock_update, app_client, auth_headers):
-        """Test updating user persona"""
-        from datetime import datetime
-        mock_update.return_value = {
-            "id": 1,
-            "user_id": 1,
-            "communication_style": "casual",
-            "detail_level": "concise",
-            "preferred_agents": ["general"],
-            "expertise_level": "intermediate",
-            "interests": ["AI"],
-            "interaction_count": 11,
-            "learning_data": {},
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
-        
-        response = app_client.put(
-            "/api/persona",
-            json={
-                "communication_style": "casual",
-                "detail_level": "concise"
-            },
-            headers=auth_headers
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["communication_style"] == "casual"
+        assert data["communication_style"] == style
+        mock_controller.assert_called_once()
 
 
 @pytest.mark.integration
@@ -343,9 +289,8 @@ class TestHealthEndpoint:
         data = response.json()
         assert data["status"] == "healthy"
     
-    def test_health_check_no_auth_required(self):
+    def test_health_check_no_auth_required(self, app_client):
         """Test health check doesn't require authentication"""
-        client = TestClient(app)
-        response = client.get("/health")
+        response = app_client.get("/health")
         
         assert response.status_code == 200
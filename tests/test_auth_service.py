@@ -3,10 +3,42 @@ Unit Tests for AuthService
 Testing authentication, token management, and user operations
 """
 
+import types
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock
 from datetime import datetime, timedelta
+from jose.exceptions import ExpiredSignatureError, JWTError
 from app.services.auth_service import AuthService
+from app.utils.auth.security import create_access_token, verify_access_token
+
+
+# Read-only payloads are built once per session and shared; MappingProxyType
+# keeps a test from mutating what the next one sees
+
+@pytest.fixture(scope="session")
+def google_token_payload():
+    """Claims returned by a verified Google ID token"""
+    return types.MappingProxyType({
+        "sub": "google_user_123",
+        "email": "test@example.com",
+        "name": "Test User",
+        "picture": "https://example.com/pic.jpg"
+    })
+
+
+@pytest.fixture(scope="session")
+def jwt_payload():
+    """Decoded access token claims, expiring well after any test run"""
+    return types.MappingProxyType({
+        "sub": "test@example.com",
+        "exp": datetime(2100, 1, 1).timestamp()
+    })
+
+
+@pytest.fixture(scope="session")
+def authorization_url_result():
+    """Return value of Flow.authorization_url: (url, state)"""
+    return ("https://accounts.google.com/o/oauth2/auth?client_id=test", "state_token")
 
 
 @pytest.mark.unit
@@ -19,9 +51,9 @@ class TestAuthService:
         """Create AuthService instance"""
         return AuthService()
     
-    @patch('app.services.auth_service.Flow.from_client_config')
-    def test_create_oauth_flow(self, mock_flow_class, auth_service):
+    def test_create_oauth_flow(self, mocker, auth_service):
         """Test OAuth flow creation"""
+        mock_flow_class = mocker.patch('app.services.auth_service.Flow.from_client_config')
         mock_flow = Mock()
         mock_flow_class.return_value = mock_flow
         
@@ -30,14 +62,11 @@ class TestAuthService:
         assert flow is not None
         mock_flow_class.assert_called_once()
     
-    @patch('app.services.auth_service.Flow.from_client_config')
-    def test_get_authorization_url(self, mock_flow_class, auth_service):
+    def test_get_authorization_url(self, mocker, auth_service, authorization_url_result):
         """Test getting Google OAuth authorization URL"""
+        mock_flow_class = mocker.patch('app.services.auth_service.Flow.from_client_config')
         mock_flow = Mock()
-        mock_flow.authorization_url.return_value = (
-            "https://accounts.google.com/o/oauth2/auth?...",
-            "state_value"
-        )
+        mock_flow.authorization_url.return_value = authorization_url_result
         mock_flow_class.return_value = mock_flow
         
         url = auth_service.get_authorization_url(state="test_state")
@@ -45,10 +74,11 @@ class TestAuthService:
         assert "https://accounts.google.com" in url
         mock_flow.authorization_url.assert_called_once()
     
-    @patch('app.services.auth_service.id_token.verify_oauth2_token')
-    @patch('app.services.auth_service.Flow.from_client_config')
-    def test_verify_google_token_success(self, mock_flow_class, mock_verify, auth_service):
+    def test_verify_google_token_success(self, mocker, auth_service, google_token_payload):
         """Test successful Google token verification"""
+        mock_flow_class = mocker.patch('app.services.auth_service.Flow.from_client_config')
+        mock_verify = mocker.patch('app.services.auth_service.id_token.verify_oauth2_token')
+        
         # Mock flow and credentials
         mock_flow = Mock()
         mock_credentials = Mock()
@@ -57,12 +87,7 @@ class TestAuthService:
         mock_flow_class.return_value = mock_flow
         
         # Mock token verification
-        mock_verify.return_value = {
-            "sub": "google_user_123",
-            "email": "test@example.com",
-            "name": "Test User",
-            "picture": "https://example.com/pic.jpg"
-        }
+        mock_verify.return_value = google_token_payload
         
         result = auth_service._verify_google_token("auth_code")
         
@@ -71,10 +96,11 @@ class TestAuthService:
         assert result["name"] == "Test User"
         mock_flow.fetch_token.assert_called_once_with(code="auth_code")
     
-    @patch('app.services.auth_service.id_token.verify_oauth2_token')
-    @patch('app.services.auth_service.Flow.from_client_config')
-    def test_verify_google_token_failure(self, mock_flow_class, mock_verify, auth_service):
+    def test_verify_google_token_failure(self, mocker, auth_service):
         """Test Google token verification failure"""
+        mock_flow_class = mocker.patch('app.services.auth_service.Flow.from_client_config')
+        mock_verify = mocker.patch('app.services.auth_service.id_token.verify_oauth2_token')
+        
         mock_flow = Mock()
         mock_flow_class.return_value = mock_flow
         
@@ -91,11 +117,9 @@ class TestAuthService:
 class TestJWTSecurity:
     """Test JWT token generation and validation"""
     
-    @patch('app.utils.auth.security.jwt.encode')
-    def test_token_creation_with_expiration(self, mock_encode):
+    def test_token_creation_with_expiration(self, mocker):
         """Test JWT token includes expiration"""
-        from app.utils.auth.security import create_access_token
-        
+        mock_encode = mocker.patch('app.utils.auth.security.jwt.encode')
         mock_encode.return_value = "encoded_token"
         
         token = create_access_token(
@@ -106,37 +130,26 @@ class TestJWTSecurity:
         assert token == "encoded_token"
         mock_encode.assert_called_once()
     
-    @patch('app.utils.auth.security.jwt.decode')
-    def test_token_validation_success(self, mock_decode):
+    def test_token_validation_success(self, mocker, jwt_payload):
         """Test successful JWT token validation"""
-        from app.utils.auth.security import verify_access_token
-        
-        mock_decode.return_value = {
-            "sub": "test@example.com",
-            "exp": (datetime.utcnow() + timedelta(hours=1)).timestamp()
-        }
+        mock_decode = mocker.patch('app.utils.auth.security.jwt.decode')
+        mock_decode.return_value = jwt_payload
         
         payload = verify_access_token("valid_token")
         
         assert payload["sub"] == "test@example.com"
     
-    @patch('app.utils.auth.security.jwt.decode')
-    def test_token_validation_expired(self, mock_decode):
+    def test_token_validation_expired(self, mocker):
         """Test expired JWT token validation"""
-        from app.utils.auth.security import verify_access_token
-        from jose.exceptions import ExpiredSignatureError
-        
+        mock_decode = mocker.patch('app.utils.auth.security.jwt.decode')
         mock_decode.side_effect = ExpiredSignatureError()
         
         with pytest.raises(ExpiredSignatureError):
             verify_access_token("expired_token")
     
-    @patch('app.utils.auth.security.jwt.decode')
-    def test_token_validation_invalid(self, mock_decode):
+    def test_token_validation_invalid(self, mocker):
         """Test invalid JWT token validation"""
-        from app.utils.auth.security import verify_access_token
-        from jose.exceptions import JWTError
-        
+        mock_decode = mocker.patch('app.utils.auth.security.jwt.decode')
         mock_decode.side_effect = JWTError()
         
         with pytest.raises(JWTError):
@@ -148,15 +161,13 @@ class TestJWTSecurity:
 class TestAuthenticationFlow:
     """Integration tests for complete authentication flow"""
     
-    @patch('app.services.auth_service.Flow.from_client_config')
-    def test_complete_google_oauth_flow(self, mock_flow_class):
+    def test_complete_google_oauth_flow(self, mocker, authorization_url_result):
         """Test complete Google OAuth authorization URL generation"""
+        mock_flow_class = mocker.patch('app.services.auth_service.Flow.from_client_config')
+        
         # Setup mocks
         mock_flow = Mock()
-        mock_flow.authorization_url.return_value = (
-            "https://accounts.google.com/o/oauth2/auth?client_id=test",
-            "state_token"
-        )
+        mock_flow.authorization_url.return_value = authorization_url_result
         mock_flow_class.return_value = mock_flow
         
         # Execute flow
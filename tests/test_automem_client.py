@@ -3,23 +3,101 @@ Unit Tests for AutoMemClient
 Testing memory storage, recall, and association functionality
 """
 
+import json
+import httpx
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch
 from app.core.automem_client import AutoMemClient, get_default_client
 
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Expected request bodies, compared whole rather than key by key
+# (query parameters arrive as strings)
+EXPECTED_RECALL_PARAMS = {"tags": "conversation_1", "query": "test query", "limit": "5"}
+EXPECTED_USER_MESSAGE_PAYLOAD = {
+    "content": "Test message",
+    "type": "conversation",
+    "importance": 0.7,  # user messages have higher importance
+    "tags": ["user_1", "user", "conversation_1"],
+}
+
+
+class _FakeAutoMem:
+    """
+    AutoMem API stand-in served through httpx.MockTransport.
+    
+    Every request is recorded; responses are `status_code` with `payload`
+    as JSON, or `error` is raised as a transport failure when set. The
+    payload is encoded once when assigned, not on every request.
+    """
+    
+    def __init__(self):
+        self.requests = []
+        self.status_code = 200
+        self.payload = {}
+        self.error = None
+    
+    @property
+    def payload(self):
+        return json.loads(self._body)
+    
+    @payload.setter
+    def payload(self, value):
+        self._body = json.dumps(value).encode()
+    
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.error is not None:
+            raise self.error
+        return httpx.Response(self.status_code, content=self._body, headers=_JSON_HEADERS)
+    
+    @property
+    def last_params(self):
+        return self.requests[-1].url.params
+    
+    @property
+    def last_json(self):
+        return json.loads(self.requests[-1].content)
+
+
+@pytest.fixture(autouse=True)
+def sleeps(monkeypatch):
+    """Record the client's time.sleep calls instead of sleeping"""
+    calls = []
+    monkeypatch.setattr("app.core.automem_client.time.sleep", calls.append)
+    return calls
+
+
+@pytest.fixture
+def automem_api():
+    """Fake AutoMem API recording the requests it receives"""
+    return _FakeAutoMem()
+
+
+@pytest.fixture
+def automem_client(automem_api):
+    """AutoMemClient built from settings whose HTTP calls go to automem_api"""
+    client = AutoMemClient()
+    client.client.close()
+    client.client = httpx.Client(
+        timeout=client.timeout,
+        transport=httpx.MockTransport(automem_api.handler)
+    )
+    yield client
+    client.client.close()
+
+
 @pytest.mark.unit
 @pytest.mark.service
 class TestAutoMemClient:
     """Test suite for AutoMemClient"""
     
-    def test_client_initialization(self):
+    def test_client_initialization(self, automem_client):
         """Test client initializes with correct defaults"""
-        client = AutoMemClient()
-        
-        assert client.base_url == "http://localhost:8001"
-        assert client.timeout == 10
-        assert client.client is not None
+        assert automem_client.base_url == "http://localhost:8001"
+        assert automem_client.timeout == 10
+        assert automem_client.client is not None
     
     def test_client_initialization_with_custom_params(self):
         """Test client initializes with custom parameters"""
@@ -33,38 +111,23 @@ class TestAutoMemClient:
         assert client.api_token == "test_token"
         assert client.timeout == 20
     
-    @patch('app.core.automem_client.get_settings')
-    def test_headers_without_token(self, mock_get_settings):
-        """Test headers generation without API token"""
-        # Mock settings to return None for API token
-        mock_settings = Mock()
-        mock_settings.AUTOMEM_URL = "http://localhost:8001"
-        mock_settings.AUTOMEM_API_TOKEN = None
-        mock_settings.AUTOMEM_TIMEOUT = 10
-        mock_get_settings.return_value = mock_settings
+    @pytest.mark.parametrize("token,expected_auth", [
+        (None, None),
+        ("test_token", "Bearer test_token"),
+    ])
+    def test_headers(self, automem_client, token, expected_auth):
+        """Test headers carry a bearer token only when one is configured"""
+        # Set directly: passing None to the constructor falls back to settings
+        automem_client.api_token = token
         
-        client = AutoMemClient()
-        headers = client._headers()
+        headers = automem_client._headers()
         
         assert headers["Content-Type"] == "application/json"
-        # Should not have Authorization header when no token in settings
-        assert "Authorization" not in headers
+        assert headers.get("Authorization") == expected_auth
     
-    def test_headers_with_token(self):
-        """Test headers generation with API token"""
-        client = AutoMemClient(api_token="test_token")
-        headers = client._headers()
-        
-        assert headers["Content-Type"] == "application/json"
-        assert headers["Authorization"] == "Bearer test_token"
-    
-    @patch('httpx.Client.get')
-    def test_recall_with_conversation_id(self, mock_get):
+    def test_recall_with_conversation_id(self, automem_api, automem_client):
         """Test recall with conversation_id filtering"""
-        # Mock response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        automem_api.payload = {
             "results": [
                 {
                     "id": "mem1",
@@ -74,10 +137,8 @@ class TestAutoMemClient:
             ],
             "vector_search": {"matched": True}
         }
-        mock_get.return_value = mock_response
         
-        client = AutoMemClient()
-        results = client.recall(
+        results = automem_client.recall(
             user_id=1,
             conversation_id=1,
             query="test query",
@@ -85,30 +146,24 @@ class TestAutoMemClient:
         )
         
         # Verify API call
-        mock_get.assert_called_once()
-        call_args = mock_get.call_args
-        assert "params" in call_args.kwargs
-        assert call_args.kwargs["params"]["tags"] == "conversation_1"
-        assert call_args.kwargs["params"]["query"] == "test query"
-        assert call_args.kwargs["params"]["limit"] == 5
+        assert len(automem_api.requests) == 1
+        request = automem_api.requests[0]
+        assert request.method == "GET"
+        assert request.url.path == "/recall"
+        assert dict(automem_api.last_params) == EXPECTED_RECALL_PARAMS
         
         # Verify results
         assert len(results) == 1
         assert results[0]["id"] == "mem1"
     
-    @patch('httpx.Client.get')
-    def test_recall_without_conversation_id(self, mock_get):
+    def test_recall_without_conversation_id(self, automem_api, automem_client):
         """Test recall with only user_id (cross-conversation)"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        automem_api.payload = {
             "results": [],
             "vector_search": {"matched": False}
         }
-        mock_get.return_value = mock_response
         
-        client = AutoMemClient()
-        results = client.recall(
+        results = automem_client.recall(
             user_id=1,
             conversation_id=None,
             query="test query",
@@ -116,23 +171,17 @@ class TestAutoMemClient:
         )
         
         # Verify tags use user_id when no conversation_id
-        call_args = mock_get.call_args
-        assert call_args.kwargs["params"]["tags"] == "user_1"
+        assert automem_api.last_params["tags"] == "user_1"
         assert results == []
     
-    @patch('httpx.Client.get')
-    def test_recall_without_vector_search(self, mock_get):
+    def test_recall_without_vector_search(self, automem_api, automem_client):
         """Test recall with tag-only mode (no vector search)"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        automem_api.payload = {
             "results": [{"id": "mem1", "memory": {"content": "Tag match"}}],
             "vector_search": {"matched": False}
         }
-        mock_get.return_value = mock_response
         
-        client = AutoMemClient()
-        results = client.recall(
+        results = automem_client.recall(
             user_id=1,
             conversation_id=1,
             query="test",
@@ -140,32 +189,32 @@ class TestAutoMemClient:
         )
         
         # Verify query is not included in params (tag-only mode)
-        call_args = mock_get.call_args
-        assert "query" not in call_args.kwargs["params"]
+        assert "query" not in automem_api.last_params
         assert len(results) == 1
     
-    @patch('httpx.Client.get')
-    def test_recall_handles_api_error(self, mock_get):
+    def test_recall_handles_api_error(self, automem_api, automem_client):
         """Test recall handles API errors gracefully"""
-        mock_get.side_effect = Exception("API Error")
+        automem_api.error = httpx.ConnectError("API Error")
         
-        client = AutoMemClient()
-        results = client.recall(user_id=1, conversation_id=1, query="test")
+        results = automem_client.recall(user_id=1, conversation_id=1, query="test")
         
         # Should return empty list on error
         assert results == []
     
-    @patch('httpx.Client.post')
-    @patch('time.sleep')
-    def test_store_message_with_conversation_id(self, mock_sleep, mock_post):
+    def test_recall_handles_http_error_status(self, automem_api, automem_client):
+        """Test recall treats non-2xx responses as errors"""
+        automem_api.status_code = 500
+        automem_api.payload = {"results": [{"id": "mem1"}]}
+        
+        results = automem_client.recall(user_id=1, conversation_id=1, query="test")
+        
+        assert results == []
+    
+    def test_store_message_with_conversation_id(self, automem_api, automem_client, sleeps):
         """Test storing message with conversation context"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"id": "new_mem", "status": "stored"}
-        mock_post.return_value = mock_response
+        automem_api.payload = {"id": "new_mem", "status": "stored"}
         
-        client = AutoMemClient()
-        result = client.store_message(
+        result = automem_client.store_message(
             user_id=1,
             conversation_id=1,
             role="user",
@@ -174,58 +223,42 @@ class TestAutoMemClient:
         )
         
         # Verify API call
-        mock_post.assert_called_once()
-        call_args = mock_post.call_args
-        payload = call_args.kwargs["json"]
-        
-        assert payload["content"] == "Test message"
-        assert payload["type"] == "conversation"
-        assert "user_1" in payload["tags"]
-        assert "user" in payload["tags"]
-        assert "conversation_1" in payload["tags"]
-        assert payload["importance"] == 0.7  # user messages have higher importance
+        assert len(automem_api.requests) == 1
+        assert automem_api.requests[0].method == "POST"
+        assert automem_api.requests[0].url.path == "/memory"
+        assert automem_api.last_json == EXPECTED_USER_MESSAGE_PAYLOAD
         
-        # Verify sleep was called
-        mock_sleep.assert_called_once_with(0.5)
+        # Verify the client paused for embedding processing
+        assert sleeps == [0.5]
         
         assert result["id"] == "new_mem"  # type: ignore
     
-    @patch('httpx.Client.post')
-    def test_store_message_without_conversation_id(self, mock_post):
+    def test_store_message_without_conversation_id(self, automem_api, automem_client):
         """Test storing message without conversation context"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"id": "new_mem"}
-        mock_post.return_value = mock_response
+        automem_api.payload = {"id": "new_mem"}
         
-        client = AutoMemClient()
-        result = client.store_message(
+        result = automem_client.store_message(
             user_id=1,
             conversation_id=None,
             role="assistant",
             content="Test response"
         )
         
-        payload = mock_post.call_args.kwargs["json"]
+        payload = automem_api.last_json
+        tags = set(payload["tags"])
         
-        assert "user_1" in payload["tags"]
-        assert "assistant" in payload["tags"]
+        assert {"user_1", "assistant"}.issubset(tags)
         assert payload["importance"] == 0.5  # assistant messages have lower importance
         # No conversation tag
-        assert not any(tag.startswith("conversation_") for tag in payload["tags"])
+        assert not any(tag.startswith("conversation_") for tag in tags)
     
-    @patch('httpx.Client.post')
-    def test_store_message_with_metadata(self, mock_post):
+    def test_store_message_with_metadata(self, automem_api, automem_client):
         """Test storing message with custom metadata"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"id": "new_mem"}
-        mock_post.return_value = mock_response
+        automem_api.payload = {"id": "new_mem"}
         
-        client = AutoMemClient()
         metadata = {"source": "test", "timestamp": "2024-01-01"}
         
-        result = client.store_message(
+        result = automem_client.store_message(
             user_id=1,
             conversation_id=1,
             role="user",
@@ -233,16 +266,13 @@ class TestAutoMemClient:
             metadata=metadata
         )
         
-        payload = mock_post.call_args.kwargs["json"]
-        assert payload["metadata"] == metadata
+        assert automem_api.last_json["metadata"] == metadata
     
-    @patch('httpx.Client.post')
-    def test_store_message_handles_error(self, mock_post):
+    def test_store_message_handles_error(self, automem_api, automem_client):
         """Test store_message handles API errors"""
-        mock_post.side_effect = Exception("API Error")
+        automem_api.error = httpx.ConnectError("API Error")
         
-        client = AutoMemClient()
-        result = client.store_message(
+        result = automem_client.store_message(
             user_id=1,
             conversation_id=1,
             role="user",
@@ -251,40 +281,32 @@ class TestAutoMemClient:
         
         assert result is None
     
-    @patch('httpx.Client.post')
-    def test_associate_memories(self, mock_post):
+    def test_associate_memories(self, automem_api, automem_client):
         """Test associating two memories"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"status": "associated"}
-        mock_post.return_value = mock_response
+        automem_api.payload = {"status": "associated"}
         
-        client = AutoMemClient()
-        result = client.associate(
+        result = automem_client.associate(
             memory1_id="mem1",
             memory2_id="mem2",
             relation_type="RELATED_TO"
         )
         
         # Verify API call
-        mock_post.assert_called_once()
-        call_args = mock_post.call_args
-        assert "/associate" in call_args.args[0]
+        assert len(automem_api.requests) == 1
+        assert automem_api.requests[0].url.path == "/associate"
         
-        payload = call_args.kwargs["json"]
+        payload = automem_api.last_json
         assert payload["memory1_id"] == "mem1"
         assert payload["memory2_id"] == "mem2"
         assert payload["type"] == "RELATED_TO"
         
         assert result is True
     
-    @patch('httpx.Client.post')
-    def test_associate_handles_error(self, mock_post):
+    def test_associate_handles_error(self, automem_api, automem_client):
         """Test associate handles API errors"""
-        mock_post.side_effect = Exception("API Error")
+        automem_api.error = httpx.ConnectError("API Error")
         
-        client = AutoMemClient()
-        result = client.associate(memory1_id="mem1", memory2_id="mem2", relation_type="RELATED_TO")
+        result = automem_client.associate(memory1_id="mem1", memory2_id="mem2", relation_type="RELATED_TO")
         
         assert result is False
     
@@ -3,52 +3,93 @@ Unit Tests for ChatService
 Testing chat processing, memory integration, and agent orchestration
 """
 
+import types
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-from langchain_core.messages import HumanMessage, AIMessage
+from unittest.mock import patch, create_autospec
+from app.core.memory.base import BaseMemoryDriver
 from app.services.chat_service import ChatService
 
 
+# Agent graph result shared by the tests; built once at import time
+_BASE_RESULT = types.MappingProxyType({
+    "final_output": "Test response",
+    "intent": "User needs help with coding",
+    "selected_agents": ["code"],
+    "knowledge_output": None,
+    "memory_output": None,
+    "research_output": None,
+    "writing_output": None,
+    "code_output": "def example(): pass"
+})
+
+
+class _GraphStub:
+    """Agent graph stand-in that returns a fixed result and records invoke calls"""
+    
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+    
+    def invoke(self, state, *args, **kwargs):
+        self.calls.append((state, args, kwargs))
+        return self.result
+
+
+@pytest.fixture(scope="class")
+def chat_service():
+    """Create one ChatService instance shared by the test class"""
+    return ChatService()
+
+
+@pytest.fixture(scope="class")
+def mock_get_driver():
+    """get_memory_driver patched once for the whole test class"""
+    with patch('app.services.chat_service.get_memory_driver') as mock_get_driver:
+        yield mock_get_driver
+
+
+@pytest.fixture(scope="class")
+def agent_graph(chat_service):
+    """Graph stub installed once on the shared service for the whole test class"""
+    real_graph = chat_service.agent_graph
+    chat_service.agent_graph = _GraphStub(None)
+    yield chat_service.agent_graph
+    chat_service.agent_graph = real_graph
+
+
 @pytest.mark.unit
 @pytest.mark.service
 class TestChatService:
     """Test suite for ChatService"""
     
-    @pytest.fixture
-    def chat_service(self):
-        """Create ChatService instance for testing"""
-        return ChatService()
+    @pytest.fixture(autouse=True)
+    def _reset_stubs(self, mock_get_driver, agent_graph):
+        """Clear a test's driver and graph setup on the shared stubs"""
+        yield
+        mock_get_driver.reset_mock(return_value=True)
+        agent_graph.result = None
+        agent_graph.calls.clear()
     
     @pytest.fixture
     def mock_agent_graph_result(self):
         """Mock result from agent graph execution"""
-        return {
-            "final_output": "Test response",
-            "intent": "User needs help with coding",
-            "selected_agents": ["code"],
-            "knowledge_output": None,
-            "memory_output": None,
-            "research_output": None,
-            "writing_output": None,
-            "code_output": "def example(): pass"
-        }
+        # Tests only replace top-level keys, so a shallow copy is enough
+        return dict(_BASE_RESULT)
     
     @pytest.fixture
     def mock_memory_driver(self):
         """Mock memory driver for testing"""
-        driver = Mock()
+        driver = create_autospec(BaseMemoryDriver, instance=True)
         driver.store.return_value = {"id": "stored_mem_id", "status": "success"}
         driver.recall.return_value = []
         return driver
     
-    @patch('app.services.chat_service.get_memory_driver')
-    def test_process_chat_basic_flow(self, mock_get_driver, chat_service, 
+    def test_process_chat_basic_flow(self, mock_get_driver, agent_graph, chat_service, 
                                      mock_memory_driver, mock_agent_graph_result):
         """Test basic chat processing flow"""
         # Setup mocks
         mock_get_driver.return_value = mock_memory_driver
-        chat_service.agent_graph = Mock()
-        chat_service.agent_graph.invoke.return_value = mock_agent_graph_result
+        agent_graph.result = mock_agent_graph_result
         
         # Execute
         result = chat_service.process_chat(
@@ -58,7 +99,7 @@ class TestChatService:
         )
         
         # Verify agent graph was invoked
-        chat_service.agent_graph.invoke.assert_called_once()
+        assert len(agent_graph.calls) == 1
         
         # Verify AutoMem store was called (2 times: user message + AI response)
         assert mock_memory_driver.store.call_count == 2
@@ -71,8 +112,7 @@ class TestChatService:
         assert result["metadata"]["knowledge_used"] is False
         assert result["metadata"]["memory_used"] is False
     
-    @patch('app.services.chat_service.get_memory_driver')
-    def test_process_chat_memory_recall_steps(self, mock_get_driver, 
+    def test_process_chat_memory_recall_steps(self, mock_get_driver, agent_graph, 
                                                chat_service, mock_memory_driver,
                                                mock_agent_graph_result):
         """Test that memory recall is now handled by memory_agent (not in chat_service)"""
@@ -82,8 +122,7 @@ class TestChatService:
         mock_agent_graph_result["memory_output"] = "Memory context from memory_agent"
         mock_agent_graph_result["selected_agents"] = ["memory", "general"]
         
-        chat_service.agent_graph = Mock()
-        chat_service.agent_graph.invoke.return_value = mock_agent_graph_result
+        agent_graph.result = mock_agent_graph_result
         
         result = chat_service.process_chat(
             user_input="Test query",
@@ -92,44 +131,28 @@ class TestChatService:
         )
         
         # Verify agent graph was invoked (memory recall happens inside the graph now)
-        chat_service.agent_graph.invoke.assert_called_once()
+        assert len(agent_graph.calls) == 1
         
         # Verify metadata indicates memory was used
         assert result["metadata"]["memory_used"] is True
         assert result["response"] == "Test response"
     
-    @patch('app.services.chat_service.get_memory_driver')
-    def test_process_chat_memory_deduplication(self, mock_get_driver,
-                                               chat_service, mock_agent_graph_result):
-        """Test that chat service works correctly"""
-        mock_client = Mock()
+    @pytest.mark.parametrize("recall_side_effect", [
+        pytest.param(None, id="recall_ok"),
+        pytest.param(Exception("AutoMem unavailable"), id="recall_error"),
+    ])
+    def test_process_chat_independent_of_driver_recall(self, mock_get_driver, agent_graph,
+                                                       chat_service, mock_agent_graph_result,
+                                                       recall_side_effect):
+        """Test chat processing leaves recall to the graph and survives recall failures"""
+        mock_client = create_autospec(BaseMemoryDriver, instance=True)
         mock_get_driver.return_value = mock_client
         mock_client.store.return_value = {"id": "stored"}
+        mock_client.recall.side_effect = recall_side_effect
         
-        chat_service.agent_graph = Mock()
-        chat_service.agent_graph.invoke.return_value = mock_agent_graph_result
-        
-        result = chat_service.process_chat(
-            user_input="Test",
-            user_id=1,
-            conversation_id=1
-        )
-        
-        # Verify it ran successfully
-        assert result["response"] == "Test response"
-        chat_service.agent_graph.invoke.assert_called_once()
-    
-    @patch('app.services.chat_service.get_memory_driver')
-    def test_process_chat_filters_current_conversation_from_long_term(self, mock_get_driver,
-                                                                       chat_service,
-                                                                       mock_agent_graph_result):
-        """Test that chat service works correctly"""
-        mock_client = Mock()
-        mock_get_driver.return_value = mock_client
-        chat_service.agent_graph = Mock()
-        chat_service.agent_graph.invoke.return_value = mock_agent_graph_result
-        mock_client.store.return_value = {"id": "stored"}
+        agent_graph.result = mock_agent_graph_result
         
+        # Should not raise exception
         result = chat_service.process_chat(
             user_input="Test",
             user_id=1,
@@ -137,16 +160,14 @@ class TestChatService:
         )
         
         assert result["response"] == "Test response"
-        chat_service.agent_graph.invoke.assert_called_once()
+        assert len(agent_graph.calls) == 1
     
-    @patch('app.services.chat_service.get_memory_driver')
-    def test_process_chat_stores_user_and_ai_messages(self, mock_get_driver,
+    def test_process_chat_stores_user_and_ai_messages(self, mock_get_driver, agent_graph,
                                                       chat_service, mock_memory_driver,
                                                       mock_agent_graph_result):
         """Test that both user and AI messages are stored"""
         mock_get_driver.return_value = mock_memory_driver
-        chat_service.agent_graph = Mock()
-        chat_service.agent_graph.invoke.return_value = mock_agent_graph_result
+        agent_graph.result = mock_agent_graph_result
         
         result = chat_service.process_chat(
             user_input="Test input",
@@ -154,50 +175,27 @@ class TestChatService:
             conversation_id=1
         )
         
-        # Verify store was called twice
+        # Verify store was called twice: user message, then assistant message
         store_calls = mock_memory_driver.store.call_args_list
         assert len(store_calls) == 2
+        user_store, ai_store = (c.kwargs for c in store_calls)
         
-        # First call: user message
-        assert store_calls[0].kwargs["content"] == "Test input"
-        assert store_calls[0].kwargs["user_id"] == 1
-        assert store_calls[0].kwargs["conversation_id"] == 1
-        assert "user" in store_calls[0].kwargs["tags"]
-        assert store_calls[0].kwargs["metadata"]["role"] == "user"
-        
-        # Second call: assistant message
-        assert store_calls[1].kwargs["content"] == "Test response"
-        assert "assistant" in store_calls[1].kwargs["tags"]
-        assert store_calls[1].kwargs["metadata"]["role"] == "assistant"
-    
-    @patch('app.services.chat_service.get_memory_driver')
-    def test_process_chat_handles_recall_error(self, mock_get_driver,
-                                               chat_service, mock_agent_graph_result):
-        """Test chat processing continues even if recall fails"""
-        mock_client = Mock()
-        mock_get_driver.return_value = mock_client
-        chat_service.agent_graph = Mock()
-        chat_service.agent_graph.invoke.return_value = mock_agent_graph_result
-        
-        mock_client.store.return_value = {"id": "stored"}
-        
-        # Should not raise exception
-        result = chat_service.process_chat(
-            user_input="Test",
-            user_id=1,
-            conversation_id=1
-        )
+        assert user_store["content"] == "Test input"
+        assert user_store["user_id"] == 1
+        assert user_store["conversation_id"] == 1
+        assert "user" in user_store["tags"]
+        assert user_store["metadata"]["role"] == "user"
         
-        assert result["response"] == "Test response"
+        assert ai_store["content"] == "Test response"
+        assert "assistant" in ai_store["tags"]
+        assert ai_store["metadata"]["role"] == "assistant"
     
-    @patch('app.services.chat_service.get_memory_driver')
-    def test_process_chat_handles_store_error(self, mock_get_driver,
+    def test_process_chat_handles_store_error(self, mock_get_driver, agent_graph,
                                               chat_service, mock_memory_driver,
                                               mock_agent_graph_result):
         """Test chat processing continues even if storage fails"""
         mock_get_driver.return_value = mock_memory_driver
-        chat_service.agent_graph = Mock()
-        chat_service.agent_graph.invoke.return_value = mock_agent_graph_result
+        agent_graph.result = mock_agent_graph_result
         
         # Make store raise an exception
         mock_memory_driver.store.side_effect = Exception("Storage failed")
@@ -211,14 +209,12 @@ class TestChatService:
         
         assert result["response"] == "Test response"
     
-    @patch('app.services.chat_service.get_memory_driver')
-    def test_process_chat_without_conversation_id(self, mock_get_driver,
+    def test_process_chat_without_conversation_id(self, mock_get_driver, agent_graph,
                                                   chat_service, mock_memory_driver,
                                                   mock_agent_graph_result):
         """Test chat processing works without conversation_id (new conversation)"""
         mock_get_driver.return_value = mock_memory_driver
-        chat_service.agent_graph = Mock()
-        chat_service.agent_graph.invoke.return_value = mock_agent_graph_result
+        agent_graph.result = mock_agent_graph_result
         
         result = chat_service.process_chat(
             user_input="Test",
@@ -228,16 +224,14 @@ class TestChatService:
         
         # Verify it still works
         assert result["response"] == "Test response"
-        chat_service.agent_graph.invoke.assert_called_once()
+        assert len(agent_graph.calls) == 1
     
-    @patch('app.services.chat_service.get_memory_driver')
-    def test_process_chat_formats_memory_context(self, mock_get_driver,
+    def test_process_chat_formats_memory_context(self, mock_get_driver, agent_graph,
                                                  chat_service, mock_agent_graph_result):
         """Test that chat service invokes agent graph correctly"""
-        mock_client = Mock()
+        mock_client = create_autospec(BaseMemoryDriver, instance=True)
         mock_get_driver.return_value = mock_client
-        chat_service.agent_graph = Mock()
-        chat_service.agent_graph.invoke.return_value = mock_agent_graph_result
+        agent_graph.result = mock_agent_graph_result
         
         mock_client.store.return_value = {"id": "stored"}
         
@@ -248,8 +242,7 @@ class TestChatService:
         )
         
         # Verify graph was called correctly
-        call_args = chat_service.agent_graph.invoke.call_args
-        state = call_args.args[0]
+        state = agent_graph.calls[0][0]
         
         assert state["user_input"] == "Test"
         assert state["user_id"] == 1
@@ -270,13 +263,11 @@ class TestChatService:
             assert "description" in agent
             assert "capabilities" in agent
     
-    @patch('app.services.chat_service.get_memory_driver')
-    def test_process_chat_fallback_response(self, mock_get_driver,
+    def test_process_chat_fallback_response(self, mock_get_driver, agent_graph,
                                            chat_service, mock_memory_driver):
         """Test fallback response when no final_output"""
         mock_get_driver.return_value = mock_memory_driver
-        chat_service.agent_graph = Mock()
-        chat_service.agent_graph.invoke.return_value = {
+        agent_graph.result = {
             "final_output": "",  # Empty response
             "intent": "test",
             "selected_agents": [],